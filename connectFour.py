@@ -15,151 +15,96 @@ on the console to confirm it was indeed a terminating condition
 
 
 import sys
-import numpy as np
 import pygame
 import math
+from connectFourBoard import (ROW_COUNT, COLUMN_COUNT, create_board, drop_piece, is_valid_location, get_next_open_row,
+                              print_board, winning_move)
 
-# rgb value of blue
-BLUE = (0,0,200)
-BLACK = (0,0,0)
-RED = (255, 0, 0)
-YELLOW = (255, 255, 0)
-
-ROW_COUNT = 6
-COLUMN_COUNT = 7
-# using numpy to create borad with all 0's initially
-def create_board():
-    board = np.zeros((ROW_COUNT,COLUMN_COUNT))
-    return board
-
-def drop_piece(board, row, col, piece):
-    board[row][col] = piece
-
-
-def is_valid_location(board, col):
-    return board[ROW_COUNT-1][col] == 0
-
-def get_next_open_row(board, col):
-    for r in range(ROW_COUNT):
-        if board[r][col] == 0:
-            return r
-
-def print_board(board):
-    print(np.flip(board, 0))
-
-
-def winning_move(board, piece):
-#     check horizontal locations
-    for c in range(COLUMN_COUNT-3):
-        for r in range(ROW_COUNT):
-            if board[r][c] == piece and board[r][c+1] == piece and board[r][c+2] == piece and board[r][c+3] == piece:
-                return True
-#         vertical locations for win
-    for c in range(COLUMN_COUNT):
-        for r in range(ROW_COUNT-3):
-            if board[r][c] == piece and board[r+1][c] == piece and board[r+2][c] == piece and board[r+3][c] == piece:
-                return True
-#         check diagonals on positive sides
-    for c in range(COLUMN_COUNT-3):
-        for r in range(ROW_COUNT-3):
-            if board[r][c] == piece and board[r+1][c+1] == piece and board[r+2][c+2] == piece and board[r+3][c+3] == piece:
-                return True
-
-#         check diagonals on negative sides
-    for c in range(COLUMN_COUNT-3):
-        for r in range(3, ROW_COUNT):
-            if board[r][c] == piece and board[r-1][c+1] == piece and board[r-2][c+2] == piece and board[r-3][c+3] == piece:
-                return True
-
-def draw_board(board):
-     for c in range(COLUMN_COUNT):
-        for r in range(ROW_COUNT):
-            pygame.draw.rect(screen, BLUE, (c*SQUARESIZE, r*SQUARESIZE+SQUARESIZE, SQUARESIZE, SQUARESIZE))
-            pygame.draw.circle(screen, BLACK, (int(c*SQUARESIZE+SQUARESIZE/2), int(r*SQUARESIZE+SQUARESIZE+SQUARESIZE/2)),RADIUS)
-
-     for c in range(COLUMN_COUNT):
-        for r in range(ROW_COUNT):
-            if board[r][c] == 1:
-                pygame.draw.circle(screen, RED, (int(c*SQUARESIZE+SQUARESIZE/2), height - int(r*SQUARESIZE+SQUARESIZE/2)), RADIUS)
-            elif board[r][c] == 2:
-                pygame.draw.circle(screen, YELLOW, (int(c*SQUARESIZE+SQUARESIZE/2), height - int(r*SQUARESIZE+SQUARESIZE/2)), RADIUS)
-     pygame.display.update()
-
-
-board = create_board()
-game_over = False
-turn = 0
-
-# for gaphics
-pygame.init()
-
-SQUARESIZE = 100
-width = COLUMN_COUNT * SQUARESIZE
-height = (ROW_COUNT+1) * SQUARESIZE
-
-size = (width , height)
-RADIUS = int(SQUARESIZE/2 - 5)
-screen = pygame.display.set_mode(size)
-draw_board(board)
-pygame.display.update()
-
-myfont = pygame.font.SysFont("monospace", 75)
-
-
-# where game begins!
-while not game_over:
-
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            sys.exit()
-
-        if event.type == pygame.MOUSEMOTION:
-            pygame.draw.rect(screen, BLACK, (0,0, width, SQUARESIZE))
-            posx = event.pos[0]
-            if turn == 0:
-                pygame.draw.circle(screen, RED, (posx, int(SQUARESIZE/2)), RADIUS)
-            else:
-                pygame.draw.circle(screen, YELLOW, (posx, int(SQUARESIZE/2)), RADIUS)
-
-        pygame.display.update()
-
-        if event.type == pygame.MOUSEBUTTONDOWN:
-            pygame.draw.rect(screen, BLACK, (0,0, width, SQUARESIZE))
-            # ask player 1 turn
-            if turn == 0:
-                posx = event.pos[0]
-                col = int(math.floor(posx/SQUARESIZE))
-
-                if is_valid_location(board, col):
-                    row = get_next_open_row(board, col)
-                    drop_piece(board, row, col, 1)
-
-                    if winning_move(board, 1):
-                        label = myfont.render("player 1 wins!", 1, RED)
-                        screen.blit(label, (40,10))
-                        game_over = True
-            # player two turn
-            else:
-                posx = event.pos[0]
-                col = int(math.floor(posx / SQUARESIZE))
+# rgb values of the discs, the board is drawn by connectFourRenderer.py
+from connectFourRenderer import BoardRenderer, RED, YELLOW
+
+# frames per second of the game loop, the window is drawn at most this often
+FPS = 30
+
+# importing this file must not start a game
+if __name__ == "__main__":
+    board = create_board()
+    game_over = False
+    turn = 0
 
-                if is_valid_location(board, col):
-                    row = get_next_open_row(board, col)
-                    drop_piece(board, row, col, 2)
+    # for gaphics
+    pygame.init()
 
-                    if winning_move(board, 2):
-                        label = myfont.render("player 2 wins!", 1, YELLOW)
-                        screen.blit(label, (40, 10))
-                        game_over = True
-            # to see board in console
-            print_board(board)
-            # to see board in via numpy graphics
-            draw_board(board)
+    SQUARESIZE = 100
+    width = COLUMN_COUNT * SQUARESIZE
+    height = (ROW_COUNT+1) * SQUARESIZE
 
-            turn += 1
+    size = (width , height)
+    screen = pygame.display.set_mode(size)
+    # the empty board is drawn once, after that only the cells that change
+    renderer = BoardRenderer(screen, ROW_COUNT, COLUMN_COUNT, SQUARESIZE)
+    renderer.draw_board(board)
+    renderer.update()
 
-            turn = turn % 2
-            # after someone win or draw shutdown the window
-            if game_over:
-                pygame.time.wait(3000)
+    myfont = pygame.font.SysFont("monospace", 75)
+    clock = pygame.time.Clock()
 
+
+    # where game begins!
+    while not game_over:
+
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                sys.exit()
+
+            # the window is only updated once a frame, after all the events
+            if event.type == pygame.MOUSEMOTION:
+                posx = event.pos[0]
+                if turn == 0:
+                    renderer.draw_hover(posx, RED)
+                else:
+                    renderer.draw_hover(posx, YELLOW)
+
+            if event.type == pygame.MOUSEBUTTONDOWN:
+                renderer.clear_strip()
+                # ask player 1 turn
+                if turn == 0:
+                    posx = event.pos[0]
+                    col = int(math.floor(posx/SQUARESIZE))
+
+                    if is_valid_location(board, col):
+                        row = get_next_open_row(board, col)
+                        drop_piece(board, row, col, 1)
+
+                        if winning_move(board, 1):
+                            label = myfont.render("player 1 wins!", 1, RED)
+                            renderer.draw_label(label)
+                            game_over = True
+                # player two turn
+                else:
+                    posx = event.pos[0]
+                    col = int(math.floor(posx / SQUARESIZE))
+
+                    if is_valid_location(board, col):
+                        row = get_next_open_row(board, col)
+                        drop_piece(board, row, col, 2)
+
+                        if winning_move(board, 2):
+                            label = myfont.render("player 2 wins!", 1, YELLOW)
+                            renderer.draw_label(label)
+                            game_over = True
+                # to see board in console
+                print_board(board)
+                # to see board in via numpy graphics
+                renderer.draw_board(board)
+
+                turn += 1
+
+                turn = turn % 2
+                # after someone win or draw shutdown the window
+                if game_over:
+                    renderer.update()
+                    pygame.time.wait(3000)
+
+        renderer.update()
+        clock.tick(FPS)
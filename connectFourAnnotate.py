@@ -0,0 +1,325 @@
+"""
+@author: Abinashi Singh
+Annotates games: every move gets the score of the move that was played and the best column
+with its score, searched by the alpha-beta mini_max of connectFourAlphaBeta.py. Every column of a
+position is searched one move less deep than the depth, so the score of the move played and the
+one of the best column come from the same search and can be compared.
+
+    python connectFourAnnotate.py games.c4r --output annotations.jsonl --depth 8 --workers 4
+
+The games are read one after the other from a game record file (connectFourRecords.py) or the
+JSONL of connectFourSelfPlay.py, they are never all in memory. The positions of a game go to a
+pool of worker processes as one task. A position that was already searched, in this game or
+another one (or its mirror), isn't searched again: most games start with the same few openings.
+Every position is searched with an empty transposition table and in the orientation of its
+canonical key, so its annotation doesn't depend on what was searched before and a run (or a run
+that was interrupted and resumed) gives the same file every time. Only max_pending
+tasks are waiting for a worker at a time and only max_games games wait to be written, reading
+stops until there is room again.
+
+Every game is one JSON line, in the order of the input:
+{"game": 0, "moves": [3, 3, ...], "winner": 2, "depth": 8, "annotations": [{"column": 3,
+"score": 12, "best": 3, "best_score": 12}, ...]}. Scores are for the player who moves,
+WIN_SCORE for a won game. score is the score of the column that was played, best_score the one
+of the best column (the center first if two are equal), so a move of the best column has
+score == best_score. A move that ended the game scores its result.
+
+The lines are flushed game by game. Run the same command again after an interruption and it
+goes on after the last game written.
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+import connectFourBitboard as bitboard
+import connectFourOrdering as move_ordering
+import connectFourTransposition as transposition
+from connectFourBitboard import EMPTY, PLAYER_PIECE, AI_PIECE, CLASSIC, canonical_key, mirror_column
+from connectFourRecords import GameRecord, RecordReader
+from connectFourSearch import mini_max
+
+DEFAULT_DEPTH = 6
+# searched positions kept to be looked up by later games, the oldest ones are dropped first
+DEFAULT_CACHE_SIZE = 1 << 20
+# games read but not written yet
+DEFAULT_MAX_GAMES = 1024
+# seconds between two progress lines
+REPORT_EVERY = 5.0
+
+# the transposition table of a worker process, emptied for every position
+_table = None
+TABLE_SIZE = 1 << 16
+
+
+"""
+search_positions: searches positions of one game, runs in a worker process. Every column that
+isn't full is played and the position after it searched depth - 1 deep
+@:params: moves= columns of the game, first_piece= piece of the first move, plies= the positions
+to search, the one before move number ply, in increasing order, depth= depth to search,
+geometry= the board, mirrored= for every ply True if the mirrored position is to be searched
+returns a list with one entry per ply: the score of every column for the player to move, None
+for a full column
+"""
+def search_positions(moves, first_piece, plies, depth, geometry, mirrored):
+    global _table
+    if _table is None:
+        _table = transposition.TranspositionTable(TABLE_SIZE)
+    # the game and the mirrored game, side by side
+    positions = (bitboard.create_position(geometry), bitboard.create_position(geometry))
+    piece = first_piece
+    results = []
+    ply = 0
+    for wanted, mirror in zip(plies, mirrored):
+        while ply < wanted:
+            bitboard.drop_piece(positions[0], moves[ply], piece)
+            bitboard.drop_piece(positions[1], mirror_column(moves[ply], geometry), piece)
+            piece = PLAYER_PIECE + AI_PIECE - piece
+            ply += 1
+        _table.clear()
+        ordering = move_ordering.HistoryOrdering(geometry)
+        position = positions[mirror]
+        # the search maximizes for AI_PIECE, after the move the other player is to move
+        maximizing = piece != AI_PIECE
+        scores = [None] * geometry.columns
+        for col in bitboard.get_valid_location(position):
+            bitboard.drop_piece(position, col, piece)
+            value = mini_max(position, depth - 1, -math.inf, math.inf, maximizing, _table, None, ordering)[1]
+            bitboard.undo_piece(position)
+            scores[col] = -value if maximizing else value
+        results.append(scores)
+    return results
+
+
+"""
+open_games: the games of a record file, or of a JSONL file of connectFourSelfPlay.py (the first
+bot plays PLAYER_PIECE there)
+@:params: path= the file
+returns the geometry and a generator of GameRecord
+"""
+def open_games(path):
+    if path.endswith(".jsonl") or path.endswith(".json"):
+        winners = {"first": PLAYER_PIECE, "second": AI_PIECE, None: EMPTY}
+
+        def games():
+            with open(path) as lines:
+                for line in lines:
+                    if line.strip():
+                        game = json.loads(line)
+                        yield GameRecord(game["moves"], PLAYER_PIECE, winners[game["winner"]], True, None)
+        return CLASSIC, games()
+    reader = RecordReader(path)
+
+    def records():
+        with reader:
+            yield from reader
+    return reader.geometry, records()
+
+
+"""
+resume: the number of games already in an output file. A last line without its newline (the run
+was stopped while writing it) is cut off
+returns the number of complete lines
+"""
+def resume(path):
+    if not os.path.exists(path):
+        return 0
+    with open(path, "rb+") as output:
+        data = output.read()
+        end = data.rfind(b"\n") + 1
+        if end < len(data):
+            output.truncate(end)
+    return data.count(b"\n", 0, end)
+
+
+class PendingGame:
+    """
+    PendingGame: a game that was read and waits for the results of its positions.
+    results[ply] holds the score of every column (None for a full one) for the player to move in
+    the position before move ply. missing counts the ones still being searched. order is the
+    center_order of the geometry, the best column is the first of it with the highest score
+    """
+    __slots__ = ("index", "record", "results", "missing", "order")
+
+    def __init__(self, index, record, order):
+        self.index = index
+        self.record = record
+        self.results = [None] * len(record.moves)
+        self.missing = 0
+        self.order = order
+
+    """
+    annotation: the JSON line of the game once every result is there
+    """
+    def annotation(self, depth):
+        record = self.record
+        moves = record.moves
+        annotations = []
+        for ply, column in enumerate(moves):
+            scores = self.results[ply]
+            best = max((col for col in self.order if scores[col] is not None), key=lambda col: scores[col])
+            annotations.append({"column": column, "score": scores[column], "best": best,
+                                "best_score": scores[best]})
+        return json.dumps({"game": self.index, "moves": moves, "winner": record.winner, "depth": depth,
+                           "annotations": annotations})
+
+
+class Annotator:
+    """
+    Annotator: the pipeline from the games to the annotations.
+    cache maps (piece to move, canonical key) to the scores of the columns of the canonical position,
+    waiting maps the same keys to the (game, ply, mirrored) that wait for a search that is running.
+    searched, cached count the positions that were searched and the ones that were not
+    """
+
+    def __init__(self, depth=DEFAULT_DEPTH, workers=None, max_pending=None, max_games=DEFAULT_MAX_GAMES,
+                 cache_size=DEFAULT_CACHE_SIZE, report_every=REPORT_EVERY, report=sys.stderr):
+        self.depth = depth
+        self.workers = workers or os.cpu_count()
+        self.max_pending = max_pending or self.workers * 4
+        self.max_games = max_games
+        self.cache_size = cache_size
+        self.report_every = report_every
+        self.report = report
+        self.cache = OrderedDict()
+        self.waiting = {}
+        self.futures = {}
+        self.games = deque()
+        self.searched = 0
+        self.cached = 0
+        self.written = 0
+
+    """
+    add_game: finds the positions of a game that have to be searched and hands them to the pool
+    """
+    def add_game(self, index, record, geometry, executor):
+        position = bitboard.create_position(geometry)
+        piece = record.first_piece
+        game = PendingGame(index, record, geometry.center_order)
+        plies = []
+        keys = []
+        mirrors = []
+        for ply in range(len(record.moves)):
+            if ply:
+                bitboard.drop_piece(position, record.moves[ply - 1], piece)
+                piece = PLAYER_PIECE + AI_PIECE - piece
+            key, mirrored = canonical_key(position.pieces[piece] + position.mask, geometry)
+            key = (piece, key)
+            entry = self.cache.get(key)
+            if entry is not None:
+                self.cache.move_to_end(key)
+                game.results[ply] = entry[::-1] if mirrored else entry
+                self.cached += 1
+                continue
+            game.missing += 1
+            if key in self.waiting:
+                # being searched for another game already
+                self.waiting[key].append((game, ply, mirrored))
+                self.cached += 1
+            else:
+                self.waiting[key] = [(game, ply, mirrored)]
+                plies.append(ply)
+                keys.append(key)
+                mirrors.append(mirrored)
+        if plies:
+            future = executor.submit(search_positions, record.moves, record.first_piece, plies, self.depth, geometry,
+                                     mirrors)
+            self.futures[future] = keys
+        self.games.append(game)
+
+    """
+    collect: takes the results of a finished task into the cache and the games that wait for them
+    """
+    def collect(self, future):
+        keys = self.futures.pop(future)
+        # the columns are the ones of the canonical positions already, mirroring reverses them
+        for key, scores in zip(keys, future.result()):
+            self.searched += 1
+            self.cache[key] = scores
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+            for game, ply, game_mirrored in self.waiting.pop(key):
+                game.results[ply] = scores[::-1] if game_mirrored else scores
+                game.missing -= 1
+
+    """
+    write_ready: writes the games at the front whose positions are all searched, in input order
+    """
+    def write_ready(self, output):
+        while self.games and not self.games[0].missing:
+            output.write(self.games.popleft().annotation(self.depth) + "\n")
+            output.flush()
+            self.written += 1
+
+    """
+    progress: one line with the games written and the positions searched per second
+    """
+    def progress(self, start):
+        elapsed = time.perf_counter() - start
+        total = self.searched + self.cached
+        print("%d games, %d positions searched, %d (%.0f%%) from the cache, %.0f positions/s, %.1f games/s"
+              % (self.written, self.searched, self.cached, 100 * self.cached / max(total, 1),
+                 self.searched / elapsed, self.written / elapsed), file=self.report)
+
+    """
+    run: annotates the games of input_path into output_path, after the games it already holds
+    returns the number of games written by this run
+    """
+    def run(self, input_path, output_path):
+        geometry, games = open_games(input_path)
+        done = resume(output_path)
+        if done:
+            print("%s already has %d games, going on after them" % (output_path, done), file=self.report)
+        start = time.perf_counter()
+        next_report = start + self.report_every
+        executor = ProcessPoolExecutor(max_workers=self.workers)
+        try:
+            with open(output_path, "a") as output:
+                for index, record in enumerate(games):
+                    if index < done:
+                        continue
+                    self.add_game(index, record, geometry, executor)
+                    # wait for the workers while too many tasks or games are waiting
+                    while self.futures and (len(self.futures) >= self.max_pending or len(self.games) >= self.max_games):
+                        for future in wait(self.futures, return_when=FIRST_COMPLETED).done:
+                            self.collect(future)
+                    self.write_ready(output)
+                    if time.perf_counter() > next_report:
+                        self.progress(start)
+                        next_report = time.perf_counter() + self.report_every
+                while self.futures:
+                    for future in wait(self.futures, return_when=FIRST_COMPLETED).done:
+                        self.collect(future)
+                    self.write_ready(output)
+                self.write_ready(output)
+        finally:
+            executor.shutdown(cancel_futures=True)
+        self.progress(start)
+        return self.written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="annotates connect four games with the engine")
+    parser.add_argument("input", help="game record file, or JSONL of connectFourSelfPlay.py")
+    parser.add_argument("--output", required=True, help="JSONL file of the annotations, appended to")
+    parser.add_argument("--depth", type=int, default=DEFAULT_DEPTH)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--max-pending", type=int, help="tasks waiting for a worker at most, 4 per worker by default")
+    parser.add_argument("--max-games", type=int, default=DEFAULT_MAX_GAMES, help="games waiting to be written at most")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_CACHE_SIZE)
+    args = parser.parse_args()
+    annotator = Annotator(args.depth, args.workers, args.max_pending, args.max_games, args.cache_size)
+    try:
+        annotator.run(args.input, args.output)
+    except KeyboardInterrupt:
+        print("stopped after %d games, run again to go on" % annotator.written, file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+@author: Abinashi Singh
+Batch evaluation: score_position, winning_move and the valid columns of many boards at once.
+
+Analysing a game log or the games of connectFourSelfPlay.py calls score_position board after
+board, and most of the time goes into calling it rather than into scoring. Here the boards are
+stacked into one (N, ROW_COUNT, COLUMN_COUNT) array and all of them are done with a few numpy
+operations, no python loop over the boards.
+
+Every window gets a code, the sum of cell * 3 ** i over its cells (0 empty, 1 player, 2 bot).
+The code is linear in the cells, so the codes of all windows of all boards are one matrix
+product of the flattened boards with a (cells, windows) matrix of powers of 3. The score of a
+window and whether it is four in a row are then looked up by code in small tables.
+
+The results are the same as the ones of connectFourBoard.py for every board:
+
+    boards = stack_boards(list_of_numpy_boards)      # or stack_positions(positions)
+    evaluation = evaluate(boards, AI_PIECE)
+    evaluation.scores     # score_position of every board
+    evaluation.wins       # winning_move of every board
+    evaluation.valid      # (N, COLUMN_COUNT) True where a disc can still be dropped
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+import connectFourBitboard as bitboard
+from connectFourBitboard import EMPTY, PLAYER_PIECE, AI_PIECE, CENTER_SCORE
+
+# boards done in one go, so the codes of a chunk take about 18 MB on the classic board
+CHUNK_SIZE = 1 << 16
+
+# results of evaluate, one entry per board
+Evaluation = namedtuple("Evaluation", ["scores", "wins", "valid"])
+
+# the code matrix and lookup tables of every geometry, worked out the first time it is used
+_batch_tables = {}
+
+
+"""
+batch_tables: the (cells, windows) matrix that turns flattened boards into window codes, and
+by piece the score of every code and whether the code is a full window of that piece
+@:params: geometry= the board
+"""
+def batch_tables(geometry):
+    tables = _batch_tables.get(geometry)
+    if tables is None:
+        connect = geometry.connect
+        powers = np.zeros((geometry.cells, len(geometry.window_cells)), dtype=np.float32)
+        for window, cells in enumerate(geometry.window_cells):
+            for index, (row, col) in enumerate(cells):
+                powers[row * geometry.columns + col, window] = 3 ** index
+        # the cells of every code, digit i is the cell i of the window
+        digits = np.arange(3 ** connect)[:, None] // 3 ** np.arange(connect) % 3
+        scores = {}
+        wins = {}
+        for piece in (PLAYER_PIECE, AI_PIECE):
+            own = np.count_nonzero(digits == piece, axis=1)
+            opponent = np.count_nonzero(digits == PLAYER_PIECE + AI_PIECE - piece, axis=1)
+            scores[piece] = np.array(geometry.window_scores)[own, opponent].astype(np.int32)
+            wins[piece] = own == connect
+        tables = _batch_tables[geometry] = (powers, scores, wins)
+    return tables
+
+
+"""
+stack_boards: one (N, rows, columns) array of numpy boards of the same size
+@:params: boards= list of numpy boards or an array that already is a stack
+returns the stack, an int8 array
+"""
+def stack_boards(boards):
+    boards = np.asarray(boards, dtype=np.int8)
+    if boards.ndim == 2:
+        boards = boards[None]
+    if boards.ndim != 3:
+        raise ValueError("expected a stack of boards, got an array of shape %s" % (boards.shape,))
+    return boards
+
+
+"""
+boards_from_bitboards: the numpy boards of N bitboards, the discs of every board are turned
+into cells with shifts on the whole array
+@:params: player, ai= the discs of both players as arrays (or lists) of ints, geometry= the board
+returns the (N, rows, columns) stack
+"""
+def boards_from_bitboards(player, ai, geometry=bitboard.CLASSIC):
+    if geometry.bits > 64:
+        raise ValueError("%r needs %d bits, more than fit in an uint64" % (geometry, geometry.bits))
+    player = np.asarray(player, dtype=np.uint64)
+    ai = np.asarray(ai, dtype=np.uint64)
+    # bit of every cell, row by row like the numpy board
+    shifts = np.array([[col * geometry.column_height + row for col in range(geometry.columns)]
+                       for row in range(geometry.rows)], dtype=np.uint64)
+    one = np.uint64(1)
+    boards = ((player[:, None, None] >> shifts) & one).astype(np.int8) * PLAYER_PIECE
+    boards += ((ai[:, None, None] >> shifts) & one).astype(np.int8) * AI_PIECE
+    return boards
+
+
+"""
+stack_positions: boards_from_bitboards of a list of bitboard positions of one geometry
+returns the (N, rows, columns) stack
+"""
+def stack_positions(positions):
+    if not positions:
+        raise ValueError("no positions to stack")
+    geometry = positions[0].geometry
+    player = np.fromiter((position.pieces[PLAYER_PIECE] for position in positions), np.uint64, len(positions))
+    ai = np.fromiter((position.pieces[AI_PIECE] for position in positions), np.uint64, len(positions))
+    return boards_from_bitboards(player, ai, geometry)
+
+
+"""
+window_codes: the code of every window of every board
+@:params: boards= (N, rows, columns) stack, geometry= the board
+returns an (N, windows) int array
+"""
+def window_codes(boards, geometry):
+    powers = batch_tables(geometry)[0]
+    flat = boards.reshape(len(boards), -1).astype(np.float32)
+    # powers of 3 up to 3 ** connect are exact in float32, so is their sum
+    return (flat @ powers).astype(np.intp)
+
+
+"""
+stack_geometry: the Geometry of a stack, by default the one of its board size with connect four
+"""
+def stack_geometry(boards, geometry=None):
+    if geometry is None:
+        geometry = bitboard.get_geometry(*boards.shape[1:])
+    return geometry
+
+
+"""
+score_positions: score_position of every board
+@:params: boards= stack of boards, piece= the player the scores are for, geometry= optional Geometry
+returns an int array with one score per board
+"""
+def score_positions(boards, piece, geometry=None):
+    return evaluate(boards, piece, geometry).scores
+
+
+"""
+winning_moves: winning_move of every board
+@:params: boards= stack of boards, piece= the player to check, geometry= optional Geometry
+returns a bool array with one flag per board
+"""
+def winning_moves(boards, piece, geometry=None):
+    boards = stack_boards(boards)
+    geometry = stack_geometry(boards, geometry)
+    wins = batch_tables(geometry)[2][piece]
+    result = np.empty(len(boards), dtype=bool)
+    for start in range(0, len(boards), CHUNK_SIZE):
+        codes = window_codes(boards[start:start + CHUNK_SIZE], geometry)
+        result[start:start + CHUNK_SIZE] = wins[codes].any(axis=1)
+    return result
+
+
+"""
+valid_locations: the columns of every board that are not full, like get_valid_location
+@:params: boards= stack of boards
+returns an (N, columns) bool array
+"""
+def valid_locations(boards):
+    return stack_boards(boards)[:, -1, :] == EMPTY
+
+
+"""
+evaluate: score_position, winning_move and the valid columns of every board, the window codes
+are only worked out once for all three
+@:params: boards= stack of boards (or a list of numpy boards), piece= the player the scores and
+wins are for, geometry= optional Geometry of the boards
+returns Evaluation
+"""
+def evaluate(boards, piece, geometry=None):
+    boards = stack_boards(boards)
+    geometry = stack_geometry(boards, geometry)
+    window_scores, window_wins = batch_tables(geometry)[1:]
+    window_scores = window_scores[piece]
+    window_wins = window_wins[piece]
+    scores = np.empty(len(boards), dtype=np.int64)
+    wins = np.empty(len(boards), dtype=bool)
+    for start in range(0, len(boards), CHUNK_SIZE):
+        chunk = boards[start:start + CHUNK_SIZE]
+        codes = window_codes(chunk, geometry)
+        center = np.count_nonzero(chunk[:, :, geometry.columns // 2] == piece, axis=1)
+        scores[start:start + CHUNK_SIZE] = window_scores[codes].sum(axis=1) + center * CENTER_SCORE
+        wins[start:start + CHUNK_SIZE] = window_wins[codes].any(axis=1)
+    return Evaluation(scores, wins, boards[:, -1, :] == EMPTY)
@@ -0,0 +1,290 @@
+"""
+@author: Abinashi Singh
+Benchmark suite of the bots.
+
+Instead of setting the depth to 5 or 6 and comparing connectFourMinMax.py with
+connectFourAlphaBeta.py by feel, this times them on a fixed set of opening, midgame and
+endgame positions:
+
+- the plain minimax bot (connectFourBoard.mini_max, the search of connectFourMinMax.py) and the
+  alpha-beta bot (connectFourSearch.mini_max) at several depths: nodes per second, time to move
+  percentiles and peak memory
+- winning_move, score_position and get_valid_location on their own, for the numpy board
+  and for the bitboard, and per board when connectFourBatch.py evaluates them all at once
+- optionally the parallel root search with 1 to N worker processes
+
+The results are saved as json, --compare prints how a run differs from an earlier one.
+
+    python connectFourBenchmark.py --output bench.json
+    python connectFourBenchmark.py --output new.json --compare bench.json
+    python connectFourBenchmark.py --parallel-workers 4 --parallel-depth 10
+"""
+
+import argparse
+import datetime
+import json
+import math
+import os
+import platform
+import subprocess
+import time
+import timeit
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import connectFourBitboard as bitboard
+import connectFourBoard as board_rules
+import connectFourBatch as batch
+import connectFourTransposition as transposition
+import connectFourOrdering as move_ordering
+from connectFourBitboard import PLAYER_PIECE, AI_PIECE
+from connectFourSearch import mini_max, parallel_mini_max
+from connectFourStats import SearchStats
+
+# copies of the corpus evaluated at once by connectFourBatch.evaluate
+BATCH_COPIES = 4096
+
+# columns played from the empty board, the player (red) moves first so the bot is to move in all of them
+POSITIONS = {
+    "opening": ["3", "343", "33242", "2345433"],
+    "midgame": ["10465504335545140", "000114063234614152305", "3523460522614", "00460306230061221"],
+    "endgame": ["4364163151216415126652644504000", "13402156001110522521540465066",
+                "5106223002540125221645150454106", "644622245545415261114616060022500"],
+}
+
+
+"""
+corpus: every position of POSITIONS
+returns a list of (phase, moves) with the moves as a list of columns
+"""
+def corpus():
+    return [(phase, [int(col) for col in moves]) for phase, games in POSITIONS.items() for moves in games]
+
+
+"""
+numpy_board: the numpy board of a list of columns
+"""
+def numpy_board(moves):
+    board = board_rules.create_board()
+    piece = PLAYER_PIECE
+    for col in moves:
+        board_rules.drop_piece(board, board_rules.get_next_open_row(board, col), col, piece)
+        piece = PLAYER_PIECE + AI_PIECE - piece
+    return board
+
+
+"""
+percentile: nearest rank percentile of a list of numbers
+"""
+def percentile(values, percent):
+    values = sorted(values)
+    rank = max(0, math.ceil(percent / 100 * len(values)) - 1)
+    return values[rank]
+
+
+"""
+search_minimax: one move of the plain minimax bot
+returns the seconds it took and the nodes searched
+"""
+def search_minimax(moves, depth):
+    board = numpy_board(moves)
+    stats = SearchStats()
+    start = time.perf_counter()
+    board_rules.mini_max(board, depth, True, stats=stats)
+    return time.perf_counter() - start, stats.nodes
+
+
+"""
+search_alphabeta: one move of the alpha-beta bot with a new transposition table and ordering
+returns the seconds it took and the nodes searched
+"""
+def search_alphabeta(moves, depth):
+    position = bitboard.from_moves(moves)
+    table = transposition.TranspositionTable(1 << 16)
+    stats = SearchStats()
+    start = time.perf_counter()
+    mini_max(position, depth, -math.inf, math.inf, True, table, None, move_ordering.HistoryOrdering(), stats)
+    return time.perf_counter() - start, stats.nodes
+
+
+SEARCHES = {
+    "minimax": search_minimax,
+    "alphabeta": search_alphabeta,
+}
+
+
+"""
+bench_search: times a search on every position of the corpus
+returns a dict of the results
+"""
+def bench_search(name, depth, repeat):
+    search = SEARCHES[name]
+    times = []
+    nodes = 0
+    for phase, moves in corpus():
+        for _ in range(repeat):
+            seconds, searched = search(moves, depth)
+            times.append(seconds)
+            nodes += searched
+    # memory in its own run, tracemalloc slows everything down
+    peak = 0
+    for phase, moves in corpus():
+        tracemalloc.start()
+        search(moves, depth)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    total = sum(times)
+    return {
+        "search": name,
+        "depth": depth,
+        "moves": len(times),
+        "nodes": nodes,
+        "seconds": total,
+        "nodes_per_second": nodes / total if total else 0.0,
+        "p50_ms": 1000 * percentile(times, 50),
+        "p90_ms": 1000 * percentile(times, 90),
+        "p99_ms": 1000 * percentile(times, 99),
+        "max_ms": 1000 * max(times),
+        "peak_memory_kb": peak / 1024,
+    }
+
+
+"""
+bench_functions: microseconds per call of the rules on their own, averaged over the corpus
+returns a dict with one entry per function
+"""
+def bench_functions(number):
+    games = corpus()
+    boards = [numpy_board(moves) for phase, moves in games]
+    positions = [bitboard.from_moves(moves) for phase, moves in games]
+    functions = {
+        "numpy.winning_move": lambda: [board_rules.winning_move(board, AI_PIECE) for board in boards],
+        "numpy.score_position": lambda: [board_rules.score_position(board, AI_PIECE) for board in boards],
+        "numpy.get_valid_location": lambda: [board_rules.get_valid_location(board) for board in boards],
+        "bitboard.winning_move": lambda: [bitboard.winning_move(position, AI_PIECE) for position in positions],
+        "bitboard.evaluate_position": lambda: [bitboard.evaluate_position(position, AI_PIECE)
+                                               for position in positions],
+        "bitboard.get_valid_location": lambda: [bitboard.get_valid_location(position) for position in positions],
+    }
+    results = {}
+    for name, function in functions.items():
+        seconds = min(timeit.repeat(function, number=number, repeat=3))
+        results[name] = {"per_call_us": 1e6 * seconds / (number * len(games))}
+    # all the boards in one stack, the time is per board
+    stack = np.repeat(batch.stack_boards(boards), BATCH_COPIES, axis=0)
+    seconds = min(timeit.repeat(lambda: batch.evaluate(stack, AI_PIECE), number=1, repeat=3))
+    results["batch.evaluate"] = {"per_call_us": 1e6 * seconds / len(stack)}
+    return results
+
+
+"""
+bench_parallel: the serial search against parallel_mini_max with 1 to N workers,
+raises if a parallel search picks another column than the serial one
+returns a list with one dict per number of workers
+"""
+def bench_parallel(depth, max_workers):
+    games = corpus()
+
+    def serial(moves):
+        return mini_max(bitboard.from_moves(moves), depth, -math.inf, math.inf, True,
+                        transposition.TranspositionTable(1 << 16), None, move_ordering.HistoryOrdering())
+
+    start = time.perf_counter()
+    columns = [serial(moves)[0] for phase, moves in games]
+    serial_time = time.perf_counter() - start
+    results = [{"workers": 0, "seconds": serial_time, "speedup": 1.0}]
+    for workers in range(1, max_workers + 1):
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # start the processes before timing
+            list(executor.map(abs, range(workers)))
+            start = time.perf_counter()
+            for (phase, moves), column in zip(games, columns):
+                parallel_column, value = parallel_mini_max(bitboard.from_moves(moves), depth, executor=executor)
+                if parallel_column != column:
+                    raise AssertionError("%s: parallel picked column %s, serial picked %s"
+                                         % ("".join(map(str, moves)), parallel_column, column))
+            seconds = time.perf_counter() - start
+        results.append({"workers": workers, "seconds": seconds, "speedup": serial_time / seconds})
+    return results
+
+
+"""
+git_commit: commit the benchmark ran on, None outside of a git checkout
+"""
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+"""
+compare: prints the change of every timing against an earlier run, + is slower
+"""
+def compare(results, baseline):
+    print("\nagainst %s (%s)" % (baseline["meta"].get("commit"), baseline["meta"].get("date")))
+    for name, result in results["functions"].items():
+        if name in baseline["functions"]:
+            before = baseline["functions"][name]["per_call_us"]
+            print("%-30s %+7.1f%%" % (name, 100 * (result["per_call_us"] / before - 1)))
+    old = {(result["search"], result["depth"]): result for result in baseline["searches"]}
+    for result in results["searches"]:
+        before = old.get((result["search"], result["depth"]))
+        if before:
+            print("%-30s %+7.1f%% p50, %+7.1f%% nps"
+                  % ("%s depth %d" % (result["search"], result["depth"]),
+                     100 * (result["p50_ms"] / before["p50_ms"] - 1),
+                     100 * (result["nodes_per_second"] / before["nodes_per_second"] - 1)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="connect four benchmark suite")
+    parser.add_argument("--minimax-depths", type=int, nargs="*", default=[2, 3, 4])
+    parser.add_argument("--alphabeta-depths", type=int, nargs="*", default=[4, 6, 8])
+    parser.add_argument("--repeat", type=int, default=3, help="times every position is searched")
+    parser.add_argument("--number", type=int, default=200, help="calls per function timing")
+    parser.add_argument("--parallel-workers", type=int, default=0, help="also time the parallel search")
+    parser.add_argument("--parallel-depth", type=int, default=10)
+    parser.add_argument("--output", help="json file for the results")
+    parser.add_argument("--compare", help="json file of an earlier run")
+    args = parser.parse_args()
+
+    results = {
+        "meta": {"commit": git_commit(), "date": datetime.datetime.now().isoformat(timespec="seconds"),
+                 "python": platform.python_version(), "machine": platform.machine(),
+                 "cpus": os.cpu_count(), "positions": POSITIONS},
+        "functions": bench_functions(args.number),
+        "searches": [],
+    }
+    print("function                        us/call")
+    for name, result in results["functions"].items():
+        print("%-30s %8.2f" % (name, result["per_call_us"]))
+
+    print("\nsearch      depth    nodes/s    p50 ms    p90 ms    p99 ms  memory kB")
+    for name, depths in (("minimax", args.minimax_depths), ("alphabeta", args.alphabeta_depths)):
+        for depth in depths:
+            result = bench_search(name, depth, args.repeat)
+            results["searches"].append(result)
+            print("%-10s %6d %10.0f %9.2f %9.2f %9.2f %10.1f"
+                  % (name, depth, result["nodes_per_second"], result["p50_ms"], result["p90_ms"],
+                     result["p99_ms"], result["peak_memory_kb"]))
+
+    if args.parallel_workers:
+        results["parallel"] = bench_parallel(args.parallel_depth, args.parallel_workers)
+        print("\nparallel depth %d\nworkers   seconds   speedup" % args.parallel_depth)
+        for result in results["parallel"]:
+            print("%7d %9.3f %9.2f" % (result["workers"], result["seconds"], result["speedup"]))
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(results, output, indent=2)
+    if args.compare:
+        with open(args.compare) as baseline:
+            compare(results, json.load(baseline))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,544 @@
+"""
+@author: Abinashi Singh
+Bitboard version of the connect four board used by the search.
+
+The numpy board is nice for drawing and printing, but the search copies it, loops over it
+to find the next open row and scans the whole grid for four in a row at every node.
+Here a position is two integers (one bit mask per player) plus the height of every column,
+so dropping and taking back a disc is O(1) and four in a row is found with a few shifts.
+
+Bit layout: every column gets ROW_COUNT + 1 bits, the extra bit on top stays empty so
+shifted lines never wrap from one column into the next one.
+
+    .  .  .  .  .  .  .
+    5 12 19 26 33 40 47
+    4 11 18 25 32 39 46
+    3 10 17 24 31 38 45
+    2  9 16 23 30 37 44
+    1  8 15 22 29 36 43
+    0  7 14 21 28 35 42
+
+Other boards and connect-N: get_geometry(rows, columns, connect) gives a Geometry with all
+the tables below worked out for that board, once per process. A position is made for one
+geometry and the functions here take the tables from position.geometry, so a 9 x 7 board or
+connect five is searched at the same speed per node as the classic board. The module level
+tables (WINDOWS, ZOBRIST, ...) are the ones of CLASSIC, the 6 x 7 connect four board.
+
+    geometry = get_geometry(7, 9, 5)
+    position = create_position(geometry)
+"""
+
+import random
+
+ROW_COUNT = 6
+COLUMN_COUNT = 7
+
+EMPTY = 0
+PLAYER_PIECE = 1
+AI_PIECE = 2
+WINDOW_LENGTH = 4
+
+# bits used by one column, including the empty guard bit on top
+COLUMN_HEIGHT = ROW_COUNT + 1
+# the center column counts 6 for every disc in it
+CENTER_SCORE = 6
+
+
+"""
+cell_bit: bit of the mask that belongs to a cell
+@:params: row, col= position on the board (row 0 is the bottom row like the numpy board),
+column_height= bits per column of the board
+returns the bit mask with only that cell set
+"""
+def cell_bit(row, col, column_height=COLUMN_HEIGHT):
+    return 1 << (col * column_height + row)
+
+
+"""
+build_window_cells: every window of connect cells that can make a connect four (or N).
+horizontal, vertical and both diagonals, 69 of them on the classic board
+returns the list of windows, every window is a tuple of (row, col) cells
+"""
+def build_window_cells(rows=ROW_COUNT, columns=COLUMN_COUNT, connect=WINDOW_LENGTH):
+    windows = []
+    for r in range(rows):
+        for c in range(columns - connect + 1):
+            windows.append(tuple((r, c + i) for i in range(connect)))
+    for c in range(columns):
+        for r in range(rows - connect + 1):
+            windows.append(tuple((r + i, c) for i in range(connect)))
+    for r in range(rows - connect + 1):
+        for c in range(columns - connect + 1):
+            windows.append(tuple((r + i, c + i) for i in range(connect)))
+    for r in range(rows - connect + 1):
+        for c in range(columns - connect + 1):
+            windows.append(tuple((r + connect - 1 - i, c + i) for i in range(connect)))
+    return windows
+
+
+"""
+evaluate_window: same scoring as evaluate_windiow but from the counts of a window
+@:params: own= discs of the current player in the window, opponent= discs of the other player,
+connect= length of the window
+returns the evaluated score
+"""
+def evaluate_window(own, opponent, connect=WINDOW_LENGTH):
+    empty = connect - own - opponent
+    score = 0
+    if own == connect:
+        score += 100
+    elif own == connect - 1 and empty == 1:
+        score += 10
+    elif own == connect - 2 and empty == 2:
+        score += 5
+    # in case the opponent is about to win
+    if opponent == connect - 1 and empty == 1:
+        score -= 8
+    return score
+
+
+class Geometry:
+    """
+    Geometry: the board size and the number in a row that wins, with every table the
+    bitboard functions need for it. Made by get_geometry, never changed afterwards.
+
+    window_cells, windows: the windows as cells and as bit masks
+    window_scores[own][opponent]: score of a window, so the leaf evaluation is only table lookups
+    window_deltas[own][opponent]: how the score of a window changes when one more own disc goes
+    in it, for the player dropping the disc and for the other player
+    cell_windows[bit]: masks of the windows that go through a cell, at most 13 of the 69
+    bottom_bits, top_bits: lowest and highest playable cell of every column
+    column_masks: playable cells of every column
+    zobrist[piece][bit], zobrist_side: zobrist keys, see below
+    mirror_bits[bit]: bit of the same cell in the mirrored position
+    center_order: columns from the center out
+    """
+
+    def __init__(self, rows=ROW_COUNT, columns=COLUMN_COUNT, connect=WINDOW_LENGTH):
+        if connect < 2 or connect > max(rows, columns):
+            raise ValueError("can't connect %d on a %d x %d board" % (connect, rows, columns))
+        self.rows = rows
+        self.columns = columns
+        self.connect = connect
+        self.column_height = column_height = rows + 1
+        self.cells = rows * columns
+        self.bits = columns * column_height
+
+        self.window_cells = build_window_cells(rows, columns, connect)
+        self.windows = [sum(cell_bit(r, c, column_height) for r, c in cells) for cells in self.window_cells]
+        self.window_scores = [[evaluate_window(own, opponent, connect) if own + opponent <= connect else 0
+                               for opponent in range(connect + 1)] for own in range(connect + 1)]
+        scores = self.window_scores
+        self.window_deltas = [[(scores[own + 1][opponent] - scores[own][opponent],
+                                scores[opponent][own + 1] - scores[opponent][own])
+                               if own + opponent < connect else (0, 0)
+                               for opponent in range(connect + 1)] for own in range(connect)]
+        self.cell_windows = [tuple(window for window in self.windows if window >> bit & 1)
+                             for bit in range(self.bits)]
+        self.center_mask = sum(cell_bit(r, columns // 2, column_height) for r in range(rows))
+        self.bottom_bits = [cell_bit(0, c, column_height) for c in range(columns)]
+        self.top_bits = [cell_bit(rows - 1, c, column_height) for c in range(columns)]
+        self.bottom_mask = sum(self.bottom_bits)
+        self.column_masks = [((1 << rows) - 1) << (c * column_height) for c in range(columns)]
+        self.full_mask = sum(self.column_masks)
+        # shifts that move a disc to its neighbour: vertical, horizontal and both diagonals
+        self.directions = (1, column_height, column_height - 1, column_height + 1)
+
+        # zobrist keys: one random 64 bit number per piece and bit, the hash of a position is the xor
+        # of the keys of its discs, so drop_piece and undo_piece update it with a single xor.
+        # fixed seed so the same position has the same hash in every process
+        zobrist_random = random.Random(20200409)
+        self.zobrist = [[zobrist_random.getrandbits(64) for bit in range(self.bits)]
+                        for piece in (EMPTY, PLAYER_PIECE, AI_PIECE)]
+        # xor-ed in when the AI is the one to move, same discs with another player to move is another position
+        self.zobrist_side = zobrist_random.getrandbits(64)
+
+        # the board is the same mirrored left to right, a position and its mirror have the same score and
+        # mirrored best moves
+        self.column_bits = column_bits = (1 << column_height) - 1
+        self.mirror_bits = [(columns - 1 - bit // column_height) * column_height + bit % column_height
+                            for bit in range(self.bits)]
+        # (bits of a column on the left half, shift to its mirror column on the right half)
+        self.mirror_pairs = [(column_bits << (c * column_height), (columns - 1 - 2 * c) * column_height)
+                             for c in range(columns // 2)]
+        # the middle column stays where it is, if there is one
+        self.mirror_center = column_bits << (columns // 2 * column_height) if columns % 2 else 0
+        # 3, 2, 4, 1, 5, 0, 6 on the classic board
+        self.center_order = sorted(range(columns), key=lambda col: abs(col - columns // 2))
+
+    def __repr__(self):
+        return "Geometry(%d, %d, %d)" % (self.rows, self.columns, self.connect)
+
+    # worker processes get the geometry of their process instead of a copy of all the tables
+    def __reduce__(self):
+        return get_geometry, (self.rows, self.columns, self.connect)
+
+
+_geometries = {}
+
+
+"""
+get_geometry: the Geometry of a board, the tables are only worked out the first time
+@:params: rows, columns= board size, connect= discs in a row that win
+returns the Geometry, always the same object for the same arguments
+"""
+def get_geometry(rows=ROW_COUNT, columns=COLUMN_COUNT, connect=WINDOW_LENGTH):
+    geometry = _geometries.get((rows, columns, connect))
+    if geometry is None:
+        geometry = _geometries[rows, columns, connect] = Geometry(rows, columns, connect)
+    return geometry
+
+
+# the classic board, and its tables under the names the rest of the code imports
+CLASSIC = get_geometry()
+WINDOW_CELLS = CLASSIC.window_cells
+WINDOWS = CLASSIC.windows
+WINDOW_SCORES = CLASSIC.window_scores
+WINDOW_DELTAS = CLASSIC.window_deltas
+CELL_WINDOWS = CLASSIC.cell_windows
+CENTER_MASK = CLASSIC.center_mask
+BOTTOM_BITS = CLASSIC.bottom_bits
+TOP_BITS = CLASSIC.top_bits
+FULL_MASK = CLASSIC.full_mask
+DIRECTIONS = CLASSIC.directions
+ZOBRIST = CLASSIC.zobrist
+ZOBRIST_SIDE = CLASSIC.zobrist_side
+COLUMN_BITS = CLASSIC.column_bits
+MIRROR_BITS = CLASSIC.mirror_bits
+
+
+class Position:
+    """
+    Position: one bit mask per piece plus the next free bit of every column.
+    pieces[PLAYER_PIECE] and pieces[AI_PIECE] hold the discs, pieces[EMPTY] is unused.
+    moves keeps the dropped columns so undo_piece can take them back.
+    hash is the zobrist hash of the discs, kept up to date by drop_piece and undo_piece,
+    mirror_hash the hash of the mirrored position, see canonical_hash.
+    scores[piece] is score_position for that piece, also kept up to date by touching only the
+    windows through the cell that changed.
+    winner is the piece that has four in a row or EMPTY, checked on the lines through every
+    dropped disc. No disc is dropped after someone won, so undo_piece sets it back to EMPTY.
+    geometry is the board the position is on.
+    """
+    __slots__ = ("pieces", "mask", "heights", "moves", "hash", "mirror_hash", "scores", "winner", "geometry")
+
+    def __init__(self, geometry=CLASSIC):
+        self.pieces = [0, 0, 0]
+        self.mask = 0
+        self.heights = list(geometry.bottom_bits)
+        self.moves = []
+        self.hash = 0
+        self.mirror_hash = 0
+        self.scores = [0, 0, 0]
+        self.winner = EMPTY
+        self.geometry = geometry
+
+
+"""
+create_position: empty position, same as create_board() for the numpy board
+@:params: geometry= the board, the classic one by default
+returns position
+"""
+def create_position(geometry=CLASSIC):
+    return Position(geometry)
+
+
+"""
+from_board: converts the numpy board of the game loop into a position
+@:params: board= numpy board (row 0 is the bottom row), geometry= the board, by default the
+one of the size of the numpy board with connect four
+returns position
+"""
+def from_board(board, geometry=None):
+    if geometry is None:
+        geometry = get_geometry(len(board), len(board[0]))
+    position = Position(geometry)
+    column_height = geometry.column_height
+    for c in range(geometry.columns):
+        for r in range(geometry.rows):
+            piece = int(board[r][c])
+            if piece == EMPTY:
+                break
+            bit = c * column_height + r
+            position.pieces[piece] |= 1 << bit
+            position.mask |= 1 << bit
+            position.heights[c] <<= 1
+            position.hash ^= geometry.zobrist[piece][bit]
+            position.mirror_hash ^= geometry.zobrist[piece][geometry.mirror_bits[bit]]
+    for piece in (PLAYER_PIECE, AI_PIECE):
+        position.scores[piece] = evaluate_position(position, piece)
+        if connected_four(position.pieces[piece], geometry):
+            position.winner = piece
+    return position
+
+
+"""
+from_moves: replays a list of columns, the players take turns
+@:params: moves= columns in the order they were played, first_piece= piece of the first move,
+geometry= the board
+returns position
+"""
+def from_moves(moves, first_piece=PLAYER_PIECE, geometry=CLASSIC):
+    position = Position(geometry)
+    piece = first_piece
+    for col in moves:
+        drop_piece(position, col, piece)
+        piece = PLAYER_PIECE + AI_PIECE - piece
+    return position
+
+
+"""
+copy_position: a position that can be changed without changing this one
+@:params: position= position
+returns the copy
+"""
+def copy_position(position):
+    copy = Position(position.geometry)
+    copy.pieces = list(position.pieces)
+    copy.mask = position.mask
+    copy.heights = list(position.heights)
+    copy.moves = list(position.moves)
+    copy.hash = position.hash
+    copy.mirror_hash = position.mirror_hash
+    copy.scores = list(position.scores)
+    copy.winner = position.winner
+    return copy
+
+
+"""
+score_change: how score_position of both players changes when a disc goes in a cell,
+only the windows through that cell can change
+@:params: position= position without the disc, move= bit of the cell, piece= disc that goes there
+returns (change for piece, change for the other player)
+"""
+def score_change(position, move, piece):
+    geometry = position.geometry
+    own = position.pieces[piece]
+    opponent = position.pieces[PLAYER_PIECE + AI_PIECE - piece]
+    own_change = CENTER_SCORE if move & geometry.center_mask else 0
+    other_change = 0
+    window_deltas = geometry.window_deltas
+    for window in geometry.cell_windows[move.bit_length() - 1]:
+        own_delta, other_delta = window_deltas[(own & window).bit_count()][(opponent & window).bit_count()]
+        own_change += own_delta
+        other_change += other_delta
+    return own_change, other_change
+
+
+"""
+drop_piece: drops a disc in a column, the row is found from the column height
+@:params: position= position, col= column, piece= AI or our player
+"""
+def drop_piece(position, col, piece):
+    geometry = position.geometry
+    move = position.heights[col]
+    own_change, other_change = score_change(position, move, piece)
+    position.scores[piece] += own_change
+    position.scores[PLAYER_PIECE + AI_PIECE - piece] += other_change
+    position.pieces[piece] |= move
+    position.mask |= move
+    position.heights[col] = move << 1
+    position.moves.append(col)
+    bit = move.bit_length() - 1
+    position.hash ^= geometry.zobrist[piece][bit]
+    position.mirror_hash ^= geometry.zobrist[piece][geometry.mirror_bits[bit]]
+    if last_move_wins(position.pieces[piece], move, geometry):
+        position.winner = piece
+
+
+"""
+undo_piece: takes back the last dropped disc
+@:params: position= position
+"""
+def undo_piece(position):
+    geometry = position.geometry
+    col = position.moves.pop()
+    move = position.heights[col] >> 1
+    position.heights[col] = move
+    position.mask ^= move
+    position.winner = EMPTY
+    piece = PLAYER_PIECE if position.pieces[PLAYER_PIECE] & move else AI_PIECE
+    position.pieces[piece] ^= move
+    bit = move.bit_length() - 1
+    position.hash ^= geometry.zobrist[piece][bit]
+    position.mirror_hash ^= geometry.zobrist[piece][geometry.mirror_bits[bit]]
+    own_change, other_change = score_change(position, move, piece)
+    position.scores[piece] -= own_change
+    position.scores[PLAYER_PIECE + AI_PIECE - piece] -= other_change
+
+
+"""
+mirror: mirrors a bit mask left to right, works on discs, masks and keys (discs + mask),
+the bits of a column never leave it
+@:params: bits= bit mask, geometry= the board
+"""
+def mirror(bits, geometry=CLASSIC):
+    mirrored = bits & geometry.mirror_center
+    # swap the columns pair by pair
+    for left, shift in geometry.mirror_pairs:
+        mirrored |= (bits & left) << shift | (bits >> shift) & left
+    return mirrored
+
+
+"""
+mirror_column: the column a column becomes in the mirrored position
+"""
+def mirror_column(col, geometry=CLASSIC):
+    return geometry.columns - 1 - col
+
+
+"""
+canonical_key: the smaller one of a key and the key of the mirrored position, so a position and
+its mirror share one entry in the tables
+@:params: key= discs of the player to move plus the mask of all discs, geometry= the board
+returns the canonical key and True if it is the mirrored one (columns stored with it are mirrored)
+"""
+def canonical_key(key, geometry=CLASSIC):
+    mirrored = mirror(key, geometry)
+    if mirrored < key:
+        return mirrored, True
+    return key, False
+
+
+"""
+canonical_hash: canonical_key for the zobrist hashes of a position
+@:params: position= position, side= zobrist_side if the AI is to move else 0
+returns the canonical hash and True if it is the hash of the mirrored position
+"""
+def canonical_hash(position, side=0):
+    key = position.hash ^ side
+    mirrored = position.mirror_hash ^ side
+    if mirrored < key:
+        return mirrored, True
+    return key, False
+
+
+"""
+is_symmetric: True if the position is its own mirror, like the empty board. Then a column and
+its mirror column lead to mirrored positions and only one of them has to be searched
+"""
+def is_symmetric(position):
+    # equal hashes first, they are almost never equal for a position that is not symmetric
+    return (position.hash == position.mirror_hash and mirror(position.mask, position.geometry) == position.mask
+            and mirror(position.pieces[PLAYER_PIECE], position.geometry) == position.pieces[PLAYER_PIECE])
+
+
+"""
+unique_moves: the valid columns without the mirrored duplicates of a symmetric position
+@:params: position= position, valid_location= valid columns
+returns the columns worth searching
+"""
+def unique_moves(position, valid_location):
+    if not is_symmetric(position):
+        return valid_location
+    last = position.geometry.columns - 1
+    return [col for col in valid_location if col <= last - col]
+
+
+"""
+is_valid_location: check if the column still has room
+@:params: position= position, col= column to check
+"""
+def is_valid_location(position, col):
+    return not position.mask & position.geometry.top_bits[col]
+
+
+"""
+get_next_open_row: row where the next disc of a column lands
+@:params: position= position, col= column to check
+"""
+def get_next_open_row(position, col):
+    return position.heights[col].bit_length() - 1 - col * position.geometry.column_height
+
+
+"""
+get_valid_location: columns that still have room
+@returns the valid location
+"""
+def get_valid_location(position):
+    mask = position.mask
+    top_bits = position.geometry.top_bits
+    return [col for col in range(len(top_bits)) if not mask & top_bits[col]]
+
+
+"""
+connected_four: shift based four (or connect) in a row check of one bit mask
+@:params: discs= bit mask of one player, geometry= the board
+returns true if there are four in a row
+"""
+def connected_four(discs, geometry=CLASSIC):
+    connect = geometry.connect
+    if connect == 4:
+        for shift in geometry.directions:
+            pairs = discs & (discs >> shift)
+            if pairs & (pairs >> (2 * shift)):
+                return True
+        return False
+    for shift in geometry.directions:
+        # runs of 1, 2, 4... discs, for four: pairs = discs & discs >> shift, pairs & pairs >> 2 * shift
+        run = discs
+        length = 1
+        while length < connect:
+            step = min(length, connect - length)
+            run &= run >> (step * shift)
+            length += step
+        if run:
+            return True
+    return False
+
+
+"""
+last_move_wins: checks only the windows through the disc that was just dropped
+@:params: discs= bit mask of the player that dropped it, move= bit of the dropped disc,
+geometry= the board
+returns true if that disc made four in a row
+"""
+def last_move_wins(discs, move, geometry=CLASSIC):
+    for window in geometry.cell_windows[move.bit_length() - 1]:
+        if discs & window == window:
+            return True
+    return False
+
+
+"""
+winning_move: checking winning move for a player. Horizontally, diagonally and vertically
+@:params: position= position, piece: disc of a current player
+returns true if winning move
+"""
+def winning_move(position, piece):
+    return connected_four(position.pieces[piece], position.geometry)
+
+
+"""
+is_terminal: us winning, or bot winning or it's a draw. Uses the winner kept by the position
+@:params: position: the current position
+returns true if terminal condition
+"""
+def is_terminal(position):
+    return position.winner != EMPTY or position.mask == position.geometry.full_mask
+
+
+"""
+score_position: same score as score_position of the numpy board. The position keeps it up
+to date with every drop, so this is only a lookup
+@:params: position= position, piece= the player the score is for
+returns the score
+"""
+def score_position(position, piece):
+    return position.scores[piece]
+
+
+"""
+evaluate_position: score_position computed from scratch over all the windows
+@:params: position= position, piece= the player the score is for
+returns the score
+"""
+def evaluate_position(position, piece):
+    geometry = position.geometry
+    own = position.pieces[piece]
+    opponent = position.pieces[PLAYER_PIECE + AI_PIECE - piece]
+    score = (own & geometry.center_mask).bit_count() * CENTER_SCORE
+    window_scores = geometry.window_scores
+    for window in geometry.windows:
+        score += window_scores[(own & window).bit_count()][(opponent & window).bit_count()]
+    return score
@@ -0,0 +1,296 @@
+"""
+@author: Abinashi Singh
+The connect four rules on the numpy board, shared by the pygame games.
+
+The board is a ROW_COUNT x COLUMN_COUNT numpy array, row 0 is the bottom row,
+EMPTY, PLAYER_PIECE or AI_PIECE in every cell. Nothing here opens a window, the
+games in connectFour.py, connectFourMinMax.py and connectFourAlphaBeta.py only draw it.
+The search of the alpha-beta bot runs on connectFourBitboard.py instead.
+
+A board of another size works too, the functions take its size from the array. The discs in a
+row that win come from a Geometry (connectFourBitboard.py), four unless one is given.
+"""
+
+import random
+import math
+import numpy as np
+import connectFourBitboard as bitboard
+# the board size and pieces are re-exported for the games
+from connectFourBitboard import ROW_COUNT, COLUMN_COUNT, EMPTY, PLAYER_PIECE, AI_PIECE, WINDOW_LENGTH
+
+# using numpy to create borad with all 0's initially
+"""create_board(): creates board with the help of numpy library.
+Initially, empty with zeroes as default values
+returns board
+"""
+
+def create_board(geometry=bitboard.CLASSIC):
+    board = np.zeros((geometry.rows, geometry.columns))
+    return board
+
+
+"""
+board_geometry: the Geometry of a board, by default the one of its size with connect four
+@:params: board= current board, geometry= the Geometry if it is already known
+"""
+def board_geometry(board, geometry=None):
+    if geometry is None:
+        geometry = bitboard.get_geometry(*board.shape)
+    return geometry
+
+
+"""
+drop_piece: To drop a disc shaped piece in the connect four board at a particular location
+@:params: board= board, row, col= position, piece= AI or our player
+"""
+def drop_piece(board, row, col, piece):
+    board[row][col] = piece
+
+"""
+is_valid_location: check if location is valid to avoid going out of the grid
+@:params: board= current board, col= column to check
+"""
+def is_valid_location(board, col):
+    return board[-1][col] == 0
+"""
+get_next_open_row: check which row is available 
+@:params: board= current board, col= column to check
+"""
+def get_next_open_row(board, col):
+    for r in range(len(board)):
+        if board[r][col] == 0:
+            return r
+"""
+print_board: To print board on the console 
+@:params: board= current board
+"""
+def print_board(board):
+    print(np.flip(board, 0))
+
+# the windows as flat indexes into the board and the window scores of every geometry,
+# worked out the first time a board of that geometry is seen
+_window_tables = {}
+
+"""
+window_tables: the windows of a geometry as flat indexes into the board, and the score of a window
+by [own discs][opponent discs]
+"""
+def window_tables(geometry):
+    tables = _window_tables.get(geometry)
+    if tables is None:
+        indexes = np.array([[r * geometry.columns + c for r, c in cells] for cells in geometry.window_cells])
+        tables = _window_tables[geometry] = (indexes, np.array(geometry.window_scores))
+    return tables
+
+# the 69 windows of four of the classic board
+WINDOW_INDEXES, WINDOW_SCORES = window_tables(bitboard.CLASSIC)
+
+"""
+winning_move: checking winning move for a current player. Horizontally, diagonally and vertically,
+every window is taken out of the board in one go instead of checking the cells one by one
+@:params: board= current board, piece: disc of a current player, geometry= optional Geometry of the board
+returns true if winning move
+"""
+def winning_move(board, piece, geometry=None):
+    indexes = window_tables(board_geometry(board, geometry))[0]
+    return bool(np.any(np.all(board.ravel()[indexes] == piece, axis=1)))
+
+"""
+score_position: to assign the score to our board. All the windows are taken out of the board
+in one go and scored with numpy instead of building python lists for every window
+@:params: board= current board, piece: disc of a current player, geometry= optional Geometry of the board
+returns the score
+"""
+def score_position(board, piece, geometry=None):
+    indexes, window_scores = window_tables(board_geometry(board, geometry))
+    # if it's not our turn, then opponent piece is AI's piece
+    opponent_piece = PLAYER_PIECE
+    if piece == PLAYER_PIECE:
+        opponent_piece = AI_PIECE
+    # to get the middle column or prefer the center position because the chances of winning are higher
+    score = int(np.count_nonzero(board[:, board.shape[1]//2] == piece)) * bitboard.CENTER_SCORE
+
+    windows = board.ravel()[indexes]
+    own = np.count_nonzero(windows == piece, axis=1)
+    opponent = np.count_nonzero(windows == opponent_piece, axis=1)
+    score += int(window_scores[own, opponent].sum())
+    return score
+
+"""
+is_terminal: checks for the terminal condition. 
+terminal node conditions are: us winning, or bot winning or it's a draw
+@:params: board: the current board
+returns true if terminal condition
+"""
+
+def is_terminal(board):
+    return winning_move(board, PLAYER_PIECE) or winning_move(board, AI_PIECE) or len(get_valid_location(board)) ==0
+
+"""
+winning_move_from: only the four lines through the disc that was just dropped can have a new four in a row
+@:params: board= current board, row, col= the dropped disc, piece: disc of a current player,
+connect= discs in a row that win
+returns true if that disc made four in a row
+"""
+def winning_move_from(board, row, col, piece, connect=WINDOW_LENGTH):
+    rows, columns = board.shape
+    for row_step, col_step in ((0, 1), (1, 0), (1, 1), (1, -1)):
+        count = 1
+        # walk both ways along the line while the discs are ours
+        for sign in (1, -1):
+            r = row + sign*row_step
+            c = col + sign*col_step
+            while 0 <= r < rows and 0 <= c < columns and board[r][c] == piece:
+                count += 1
+                r += sign*row_step
+                c += sign*col_step
+        if count >= connect:
+            return True
+    return False
+
+"""
+get_valid_location: if valid_location returns true, this functions returns the position of valid locations
+@returns the valid location
+"""
+
+def get_valid_location(board):
+    valid_location = []
+    for col in range(board.shape[1]):
+        if is_valid_location(board, col):
+            valid_location.append(col)
+
+    return valid_location
+
+"""
+pick_best_move: greedy bot, the column with the best score_position after one move
+@:params: board= current board, piece: disc of the bot
+returns the column
+"""
+def pick_best_move(board, piece):
+    valid_location = get_valid_location(board)
+    # best score
+    best_score = 0
+    best_col = random.choice(valid_location)
+    for col in valid_location:
+        row = get_next_open_row(board, col)
+        # temporary testing the move. Making .copy() to avoid changes in our original board
+        temp_board = board.copy()
+        drop_piece(temp_board, row, col, piece)
+        score = score_position(temp_board, piece)
+        if score > best_score:
+            best_score = score
+            best_col = col
+    return best_col
+
+"""
+tactical_moves: looks at the moves of a board before mini_max searches them. winning_move_from
+doesn't look at the cell it is given, so nothing is dropped to try a move
+@:params: board= board that is not over, piece= the player to move, valid_location= its columns,
+connect= discs in a row that win
+returns (win, moves, threats): win is a column that wins right away or None, moves the columns
+worth searching (only the block if the opponent threatens to win, none that give the opponent
+the cell on top to win in, empty if the game is lost) and threats the columns the opponent wins in
+"""
+def tactical_moves(board, piece, valid_location, connect=WINDOW_LENGTH):
+    opponent = PLAYER_PIECE + AI_PIECE - piece
+    rows = board.shape[0]
+    threats = []
+    for col in valid_location:
+        row = get_next_open_row(board, col)
+        if winning_move_from(board, row, col, piece, connect):
+            return col, [col], threats
+        if winning_move_from(board, row, col, opponent, connect):
+            threats.append(col)
+    if len(threats) > 1:
+        return None, [], threats
+    moves = []
+    for col in threats or valid_location:
+        row = get_next_open_row(board, col) + 1
+        # the disc would go below a cell where the opponent wins
+        if row < rows and winning_move_from(board, row, col, opponent, connect):
+            continue
+        moves.append(col)
+    return None, moves, threats
+
+# followed pseudocode from Wikipedia minMax
+"""
+mini_max: the plain minimax bot of connectFourMinMax.py, every move is searched on a copy
+of the numpy board and nothing is pruned. A win in one is played at once, a threat of the
+opponent is blocked and a lost position isn't searched (tactical_moves)
+@:params: board: the current board, depth= how far to look, maximizingPlayer= maximizer player,
+winner= the piece that won
+with the last drop (EMPTY if nobody), the parent knows it from winning_move_from so the board is
+not scanned again. Left out on the first call, geometry= optional Geometry of the board, the
+one of its size with connect four by default, stats= optional SearchStats (connectFourStats.py)
+that counts the positions visited
+returns the winning score and column that gave that score
+"""
+def mini_max(board, depth, maximizingPlayer, winner=None, geometry=None, stats=None):
+
+    geometry = board_geometry(board, geometry)
+    connect = geometry.connect
+    if stats is not None:
+        stats.nodes += 1
+    if winner is None:
+        winner = EMPTY
+        if winning_move(board, AI_PIECE, geometry):
+            winner = AI_PIECE
+        elif winning_move(board, PLAYER_PIECE, geometry):
+            winner = PLAYER_PIECE
+    valid_location = get_valid_location(board)
+    terminal = winner != EMPTY or len(valid_location) == 0
+    if depth ==0 or terminal:
+        if terminal:
+            if stats is not None:
+                stats.terminals += 1
+            # if it's a bot's winning move
+            if winner == AI_PIECE:
+                # none will take place of the column that produces the best score
+                return (None, 10000000)
+            elif winner == PLAYER_PIECE:
+                # none will take place of the column that produces the best score
+                return (None, -10000000)
+            else:
+                return (None, 0)  #game is over
+        else: #when depth is 0
+            if stats is not None:
+                stats.leaves += 1
+            return (None, score_position(board, AI_PIECE, geometry))
+    piece = AI_PIECE if maximizingPlayer else PLAYER_PIECE
+    win, moves, threats = tactical_moves(board, piece, valid_location, connect)
+    if stats is not None and (win is not None or not moves):
+        stats.tactical += 1
+    if win is not None:
+        return win, (10000000 if maximizingPlayer else -10000000)
+    if not moves:
+        # the opponent wins with the next disc, whatever is played, one of its threats is blocked
+        return (threats or valid_location)[0], (-10000000 if maximizingPlayer else 10000000)
+    valid_location = moves
+    #     True and false below will help us switch between players
+    if maximizingPlayer:
+        column = random.choice(valid_location)
+        value = -math.inf
+        for col in valid_location:
+            row= get_next_open_row(board, col)
+            b_copy = board.copy()
+            drop_piece(b_copy, row, col, AI_PIECE)
+            winner = AI_PIECE if winning_move_from(b_copy, row, col, AI_PIECE, connect) else EMPTY
+            # [1] because 1st index is giving the best score
+            new_score = mini_max(b_copy, depth-1, False, winner, geometry, stats)[1]
+            if new_score > value:
+                value = new_score
+                column = col #which col gave you the best score
+        return column, value
+    else: # for minimizer
+        column = random.choice(valid_location)
+        value = math.inf
+        for col in valid_location:
+            row= get_next_open_row(board, col)
+            b_copy = board.copy()
+            drop_piece(b_copy, row, col, PLAYER_PIECE)
+            winner = PLAYER_PIECE if winning_move_from(b_copy, row, col, PLAYER_PIECE, connect) else EMPTY
+            new_score =  mini_max(b_copy, depth-1, True, winner, geometry, stats)[1]
+            if new_score < value:
+                value = new_score
+                column = col #which col gave you the best score
+        return column, value
@@ -0,0 +1,253 @@
+"""
+@author: Abinashi Singh
+Opening book.
+
+The first moves are the slowest ones for mini_max, nothing is pruned yet and the tree is at
+its widest, but they are the same in almost every game. The book generator searches every
+position up to a number of discs once and writes the best column and its score to a file,
+the bot then looks the position up instead of searching it.
+
+The file is an 18 byte header and the positions sorted by key, 13 bytes each on the classic board:
+
+    header   "C4BK", version, rows, columns, connect, plies, mode (0 search, 1 solver),
+             bytes per key, depth, count
+    record   key (8 bytes on the classic board), score (4 bytes, signed), column (1 byte), little endian
+
+The key is the discs of the player to move plus the mask of all discs (the key of the solver),
+the same position gets the same key whatever the order of the moves and the color of the player
+to move, and the score is for the player to move: the mini_max score of a searched book, the
+solver's score (discs left when the game is won, connectFourSolver.py) of a solved one. probe()
+turns a solver score into WIN_SCORE, -WIN_SCORE or 0 like the endgame cache does, so a book hit
+has the same kind of score as a search whatever the book was made with. A position and its mirror are stored once,
+under the smaller key (canonical_key) with the column of that one. OpeningBook maps the file
+with mmap and finds a key with a binary search, so opening it takes no time, a probe reads a
+few pages and processes that open the same book share its pages.
+
+    python connectFourBook.py --plies 6 --depth 10 --output book.bin
+    engine = Engine(book="book.bin")
+
+--solve is only for small boards. The solver is pure Python and takes minutes to hours for one
+position with few discs on the classic board, so an exact classic book needs a faster solver
+than connectFourSolver.py. On a small board it is quick:
+
+    python connectFourBook.py --rows 4 --columns 5 --connect 3 --plies 4 --solve --output small.bin
+"""
+
+import argparse
+import math
+import mmap
+import os
+import struct
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import connectFourBitboard as bitboard
+import connectFourTransposition as transposition
+import connectFourOrdering as move_ordering
+from connectFourBitboard import PLAYER_PIECE, AI_PIECE, CLASSIC, get_geometry
+from connectFourSearch import WIN_SCORE, mini_max
+from connectFourSolver import Solver
+
+MAGIC = b"C4BK"
+VERSION = 3
+HEADER = struct.Struct("<4sBBBBBBBxHI")
+# score and column, after the key
+VALUE = struct.Struct("<iB")
+SEARCH, SOLVE = 0, 1
+
+# one solver per geometry and worker process, its table is useful for the next positions
+_solvers = {}
+
+
+"""
+position_key: key of the position in the book
+@:params: position= Position, piece= the player to move
+returns the key and True if it is the key of the mirrored position
+"""
+def position_key(position, piece=AI_PIECE):
+    return bitboard.canonical_key(position.pieces[piece] + position.mask, position.geometry)
+
+
+"""
+key_bytes: bytes a key of the geometry takes in the file
+"""
+def key_bytes(geometry):
+    return (geometry.bits + 7) // 8
+
+
+"""
+opening_positions: every position up to plies discs that is not over yet, once per key
+(so only one of a position and its mirror)
+@:params: plies= most discs on the board, geometry= the board
+returns a dict of key -> (columns played to get there, True if they give the mirrored position)
+"""
+def opening_positions(plies, geometry=CLASSIC):
+    positions = {}
+    position = bitboard.create_position(geometry)
+
+    def visit(piece):
+        key, mirrored = position_key(position, piece)
+        if key in positions:
+            return
+        positions[key] = (list(position.moves), mirrored)
+        if len(position.moves) == plies:
+            return
+        for col in bitboard.get_valid_location(position):
+            bitboard.drop_piece(position, col, piece)
+            if position.winner == bitboard.EMPTY:
+                visit(PLAYER_PIECE + AI_PIECE - piece)
+            bitboard.undo_piece(position)
+
+    visit(PLAYER_PIECE)
+    return positions
+
+
+"""
+evaluate: best column and score of one book position, runs in a worker process
+@:params: moves= columns played, mode= SEARCH or SOLVE, depth= search depth, geometry= the board
+returns (column, score) for the player to move
+"""
+def evaluate(moves, mode, depth, geometry=CLASSIC):
+    # the bot is the player to move, whoever started
+    position = bitboard.from_moves(moves, AI_PIECE if len(moves) % 2 == 0 else PLAYER_PIECE, geometry)
+    if mode == SOLVE:
+        solver = _solvers.get(geometry)
+        if solver is None:
+            solver = _solvers[geometry] = Solver(geometry=geometry)
+        col, solution = solver.best_column(position)
+        return col, solution.score
+    col, score = mini_max(position, depth, -math.inf, math.inf, True, transposition.TranspositionTable(1 << 18),
+                          None, move_ordering.HistoryOrdering(geometry))
+    return col, max(-2 ** 31, min(2 ** 31 - 1, int(score)))
+
+
+"""
+write_book: writes the book file, to a temporary file first so readers never see half a book
+@:params: path= file, entries= dict of key -> (column, score), plies, mode, depth= how it was made,
+geometry= the board
+"""
+def write_book(path, entries, plies, mode, depth, geometry=CLASSIC):
+    temporary = path + ".tmp"
+    size = key_bytes(geometry)
+    with open(temporary, "wb") as output:
+        output.write(HEADER.pack(MAGIC, VERSION, geometry.rows, geometry.columns, geometry.connect, plies, mode,
+                                 size, depth, len(entries)))
+        for key in sorted(entries):
+            col, score = entries[key]
+            output.write(key.to_bytes(size, "little") + VALUE.pack(score, col))
+    os.replace(temporary, path)
+
+
+"""
+generate: searches every opening position and writes the book
+@:params: path= file, plies= most discs on the board, mode= SEARCH or SOLVE, depth= search depth,
+workers= processes, progress= called with (done, total) now and then, geometry= the board
+returns the number of positions in the book
+"""
+def generate(path, plies, mode=SEARCH, depth=10, workers=None, progress=None, geometry=CLASSIC):
+    positions = opening_positions(plies, geometry)
+    keys = list(positions)
+    entries = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(evaluate, [positions[key][0] for key in keys], [mode] * len(keys),
+                               [depth] * len(keys), [geometry] * len(keys),
+                               chunksize=max(1, len(keys) // ((workers or 1) * 32)))
+        for key, (col, score) in zip(keys, results):
+            # the column of the canonical position
+            entries[key] = (bitboard.mirror_column(col, geometry) if positions[key][1] else col, score)
+            if progress is not None and len(entries) % 1000 == 0:
+                progress(len(entries), len(keys))
+    write_book(path, entries, plies, mode, depth, geometry)
+    return len(entries)
+
+
+class OpeningBook:
+    """
+    OpeningBook: read only view of a book file. probe() gives the column and score of a position
+    or None when the position is not in the book. geometry is the board the book was made for,
+    mode SEARCH or SOLVE how its scores were worked out
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as book:
+            self.data = mmap.mmap(book.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, rows, columns, connect, self.plies, self.mode, self.key_bytes, self.depth, self.count = \
+            HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or version != VERSION:
+            self.data.close()
+            raise ValueError("%s is not an opening book" % path)
+        self.geometry = get_geometry(rows, columns, connect)
+        self.record = self.key_bytes + VALUE.size
+        if len(self.data) != HEADER.size + self.count * self.record:
+            self.data.close()
+            raise ValueError("%s is truncated" % path)
+
+    def __len__(self):
+        return self.count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    """
+    probe: looks a position up
+    @:params: position= Position, piece= the player to move (the bot by default)
+    returns (column, score) or None, also for a position of another geometry. The score is a
+    mini_max score for the player to move, a solved win is WIN_SCORE
+    """
+    def probe(self, position, piece=AI_PIECE):
+        if position.geometry is not self.geometry or position.mask.bit_count() > self.plies:
+            return None
+        key, mirrored = position_key(position, piece)
+        data = self.data
+        size = self.key_bytes
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            offset = HEADER.size + middle * self.record
+            found = int.from_bytes(data[offset:offset + size], "little")
+            if found < key:
+                low = middle + 1
+            elif found > key:
+                high = middle
+            else:
+                score, col = VALUE.unpack_from(data, offset + size)
+                if self.mode == SOLVE:
+                    # won or lost with perfect play, like a finished game in mini_max
+                    score = WIN_SCORE if score > 0 else -WIN_SCORE if score < 0 else 0
+                return (bitboard.mirror_column(col, self.geometry) if mirrored else col), score
+        return None
+
+    """
+    close: unmaps the file
+    """
+    def close(self):
+        self.data.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="connect four opening book generator")
+    parser.add_argument("--plies", type=int, default=6, help="book every position with up to this many discs")
+    parser.add_argument("--depth", type=int, default=10, help="search depth of every position")
+    parser.add_argument("--solve", action="store_true", help="exact scores with the solver instead of the search, small boards only")
+    parser.add_argument("--rows", type=int, default=CLASSIC.rows)
+    parser.add_argument("--columns", type=int, default=CLASSIC.columns)
+    parser.add_argument("--connect", type=int, default=CLASSIC.connect, help="discs in a row that win")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--output", default="book.bin")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    count = generate(args.output, args.plies, SOLVE if args.solve else SEARCH, args.depth, args.workers,
+                     lambda done, total: print("%d / %d" % (done, total), file=sys.stderr),
+                     get_geometry(args.rows, args.columns, args.connect))
+    print("%d positions in %.1fs, %d bytes" % (count, time.perf_counter() - start, os.path.getsize(args.output)),
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
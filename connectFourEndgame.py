@@ -0,0 +1,197 @@
+"""
+@author: Abinashi Singh
+Endgame cache: exact results of positions with only a few empty cells left.
+
+Near the end of the game mini_max keeps searching the same small positions, move after move,
+and still only guesses them with score_position, while the solver (connectFourSolver.py) gets
+their exact result in a millisecond. EndgameCache solves every position with at most max_empty
+empty cells the first time it is asked and remembers the result, mini_max treats those positions
+like finished games: a won, lost or drawn position, it doesn't search below them. A solve
+gets the deadline and stop event of the search and ends with SearchTimeout like mini_max does,
+nothing is cached for a position whose solve was ended.
+
+The cache keeps the capacity positions that were used last (LRU). With a path it is loaded
+from that file when it is made and save() writes it back, so the next game starts with the
+positions of the last ones. The file is a header and the key and score of every position,
+9 bytes on the classic board (the key takes as many bytes as the bits of the geometry need).
+
+    endgame = EndgameCache(max_empty=12, path="endgame.bin")
+    engine = Engine(endgame=endgame)
+    ...
+    endgame.save()
+"""
+
+import os
+import struct
+from collections import OrderedDict
+
+from connectFourBitboard import AI_PIECE, PLAYER_PIECE, CLASSIC, canonical_key
+from connectFourSolver import Solver, winning_cells, playable_cells, describe
+
+# positions solved by default, the solver needs about a millisecond for 12 empty cells
+DEFAULT_EMPTY_CELLS = 12
+DEFAULT_CAPACITY = 1 << 18
+
+MAGIC = b"C4EG"
+VERSION = 3
+# magic, version, rows, columns, connect, max_empty, bytes per key, count
+HEADER = struct.Struct("<4sBBBBBBI")
+SCORE = struct.Struct("<b")
+
+
+class EndgameCache:
+    """
+    EndgameCache: solved positions by canonical key (discs of the player to move plus the mask of
+    all discs, the same key as the opening book), a position and its mirror have the same score
+    and share one entry. Scores are the solver scores for the player to move.
+    hits and misses count the lookups. One cache holds the positions of one geometry
+    """
+
+    def __init__(self, max_empty=DEFAULT_EMPTY_CELLS, capacity=DEFAULT_CAPACITY, path=None, geometry=CLASSIC):
+        self.max_empty = max_empty
+        self.capacity = capacity
+        self.path = path
+        self.geometry = geometry
+        self.key_bytes = (geometry.bits + 7) // 8
+        self.entries = OrderedDict()
+        self.solver = Solver(geometry=geometry)
+        self.hits = 0
+        self.misses = 0
+        if path is not None and os.path.exists(path):
+            self.load(path)
+
+    def __len__(self):
+        return len(self.entries)
+
+    """
+    covers: True if the position has few enough empty cells to be solved
+    """
+    def covers(self, position):
+        return self.geometry.cells - position.mask.bit_count() <= self.max_empty
+
+    """
+    score: exact score of a position that is not over yet, solved or taken from the cache
+    @:params: discs= discs of the player to move, mask= all discs, deadline= optional
+    time.perf_counter() value, stop= optional threading.Event
+    returns the solver score for the player to move, raises SearchTimeout if the solve is ended
+    """
+    def score(self, discs, mask, deadline=None, stop=None):
+        key = canonical_key(discs + mask, self.geometry)[0]
+        entries = self.entries
+        score = entries.get(key)
+        if score is not None:
+            self.hits += 1
+            entries.move_to_end(key)
+            return score
+        self.misses += 1
+        score = self.solver.solve_score(discs, mask, deadline, stop)
+        entries[key] = score
+        if len(entries) > self.capacity:
+            entries.popitem(last=False)
+        return score
+
+    """
+    solve: exact result of a position that is not over yet
+    @:params: position= Position, piece= the player to move
+    returns a Solution (see connectFourSolver.py) for that player
+    """
+    def solve(self, position, piece=AI_PIECE):
+        return describe(self.score(position.pieces[piece], position.mask), position.mask.bit_count(),
+                        self.geometry.cells)
+
+    """
+    value: mini_max score of a position that is not over yet, like the score of a finished game:
+    WIN_SCORE if the bot wins with perfect play, -WIN_SCORE if it loses and 0 for a draw
+    @:params: position= Position, maximizingPlayer= True if the bot is to move, win_score= WIN_SCORE,
+    deadline, stop= like score
+    """
+    def value(self, position, maximizingPlayer, win_score, deadline=None, stop=None):
+        piece = AI_PIECE if maximizingPlayer else PLAYER_PIECE
+        score = self.score(position.pieces[piece], position.mask, deadline, stop)
+        if not maximizingPlayer:
+            score = -score
+        if score > 0:
+            return win_score
+        if score < 0:
+            return -win_score
+        return 0
+
+    """
+    best_column: the column with the best exact result, the positions after every move are
+    looked up in (and added to) the cache
+    @:params: position= Position that is not over yet, piece= the player to move, deadline, stop= like score
+    returns the column and its Solution
+    """
+    def best_column(self, position, piece=AI_PIECE, deadline=None, stop=None):
+        geometry = self.geometry
+        cells = geometry.cells
+        discs = position.pieces[piece]
+        mask = position.mask
+        moves = mask.bit_count()
+        possible = playable_cells(mask, geometry)
+        winning = winning_cells(discs, mask, geometry) & possible
+        best = None
+        best_score = None
+        for col in geometry.center_order:
+            move = possible & geometry.column_masks[col]
+            if not move:
+                continue
+            if winning & move:
+                return col, describe((cells + 1 - moves) // 2, moves, cells)
+            if moves + 1 == cells:
+                score = 0
+            else:
+                score = -self.score(discs ^ mask, mask | move, deadline, stop)
+            if best_score is None or score > best_score:
+                best, best_score = col, score
+        return best, describe(best_score, moves, cells)
+
+    """
+    best_move: best_column for the bot, with the score mini_max would give it
+    @:params: position= Position that is not over yet with the bot to move, win_score= WIN_SCORE,
+    deadline, stop= like score
+    returns the column and its score
+    """
+    def best_move(self, position, win_score, deadline=None, stop=None):
+        col, solution = self.best_column(position, AI_PIECE, deadline, stop)
+        if solution.score > 0:
+            return col, win_score
+        if solution.score < 0:
+            return col, -win_score
+        return col, 0
+
+    """
+    load: adds the positions of a cache file, raises ValueError if it is not one for this board
+    """
+    def load(self, path):
+        with open(path, "rb") as cache:
+            data = cache.read()
+        magic, version, rows, columns, connect, max_empty, key_bytes, count = HEADER.unpack_from(data, 0)
+        geometry = self.geometry
+        if (magic != MAGIC or version != VERSION
+                or (rows, columns, connect) != (geometry.rows, geometry.columns, geometry.connect)):
+            raise ValueError("%s is not an endgame cache for %r" % (path, geometry))
+        record = key_bytes + SCORE.size
+        if len(data) != HEADER.size + count * record:
+            raise ValueError("%s is truncated" % path)
+        for offset in range(HEADER.size, len(data), record):
+            key = int.from_bytes(data[offset:offset + key_bytes], "little")
+            self.entries[key] = SCORE.unpack_from(data, offset + key_bytes)[0]
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+    """
+    save: writes the cache to path (the path it was made with by default), to a temporary
+    file first so a crash never leaves half a file
+    """
+    def save(self, path=None):
+        path = path or self.path
+        temporary = path + ".tmp"
+        with open(temporary, "wb") as output:
+            geometry = self.geometry
+            output.write(HEADER.pack(MAGIC, VERSION, geometry.rows, geometry.columns, geometry.connect,
+                                     self.max_empty, self.key_bytes, len(self.entries)))
+            # least recently used first, so loading keeps the LRU order
+            for key, score in self.entries.items():
+                output.write(key.to_bytes(self.key_bytes, "little") + SCORE.pack(score))
+        os.replace(temporary, path)
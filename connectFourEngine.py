@@ -0,0 +1,347 @@
+"""
+@author: Abinashi Singh
+Headless connect four engine: the rules, the evaluation and the alpha-beta search,
+without pygame or numpy, so it can be imported by scripts, batch jobs and servers.
+
+    import connectFourEngine as engine
+    position = engine.create_position()
+    engine.drop_piece(position, 3, engine.PLAYER_PIECE)
+    col, score = engine.best_move(position, depth=8)          # fixed depth
+    col, score = engine.best_move(position, time_limit=500)   # milliseconds
+    solution = engine.solve(position)                         # exact result, see connectFourSolver.py
+
+    search = Engine().search_async(board, time_limit=1000)    # thinks on a background thread
+    search.depth, search.column                               # deepest finished depth so far
+    col, score = search.result()                              # or await search, or search.cancel()
+    engine.ponder(board)                                      # search the replies on the opponent's time
+    col, value = MCTS().best_move(position, time_limit=500)   # Monte Carlo tree search, see connectFourMCTS.py
+
+The bot is always AI_PIECE. Engine keeps the transposition table, the move ordering and the
+worker processes between the moves of a game, best_move makes a new one for every call.
+With an opening book (connectFourBook.py) the first moves are looked up instead of searched,
+with an EndgameCache (connectFourEndgame.py) the last ones are solved.
+
+Other boards and rules are a Geometry: Engine(geometry=get_geometry(rows=7, columns=9, connect=5))
+plays connect five on a 9 x 7 board, positions are made with create_position(geometry).
+"""
+
+import asyncio
+import logging
+import math
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+import connectFourTransposition as transposition
+import connectFourOrdering as move_ordering
+# the rules and the search are re-exported, users of the engine only import this module
+from connectFourBitboard import (ROW_COUNT, COLUMN_COUNT, EMPTY, PLAYER_PIECE, AI_PIECE, Position,
+                                 Geometry, CLASSIC, get_geometry,
+                                 create_position, from_board, from_moves, copy_position, drop_piece, undo_piece,
+                                 is_valid_location, get_next_open_row, get_valid_location, winning_move,
+                                 is_terminal, score_position)
+from connectFourSearch import (WIN_SCORE, SearchTimeout, mini_max, iterative_deepening, parallel_mini_max, ponder,
+                               ponder_key)
+from connectFourStats import SearchStats
+from connectFourSolver import Solver, Solution, solve
+from connectFourBook import OpeningBook
+from connectFourEndgame import EndgameCache
+from connectFourMCTS import MCTS
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncSearch:
+    """
+    AsyncSearch: a best_move running on the search thread of an Engine (see Engine.search_async).
+    depth, column and score are the deepest depth finished so far and its move (0, None, None
+    before the first one), for a "thinking" display. done() and result() like a Future, and it can
+    be awaited in asyncio. cancel() stops the search: with a time_limit the result is the move of
+    the deepest finished depth, a fixed depth search raises SearchTimeout instead
+    """
+
+    def __init__(self, progress=None):
+        self.stop = threading.Event()
+        self.progress = progress
+        self.depth = 0
+        self.column = None
+        self.score = None
+        self.future = None
+
+    """
+    update: the search finished a depth, runs on the search thread
+    """
+    def update(self, depth, column, score):
+        self.depth, self.column, self.score = depth, column, score
+        if self.progress is not None:
+            self.progress(depth, column, score)
+
+    def done(self):
+        return self.future.done()
+
+    """
+    result: waits for the search
+    @:params: timeout= seconds to wait at most, forever by default
+    returns the column and its score
+    """
+    def result(self, timeout=None):
+        return self.future.result(timeout)
+
+    """
+    cancel: stops the search, or drops it if it hasn't started yet
+    """
+    def cancel(self):
+        self.stop.set()
+        self.future.cancel()
+
+    def __await__(self):
+        return self.wait().__await__()
+
+    """
+    wait: result() for asyncio, cancelling the task that waits cancels the search
+    """
+    async def wait(self):
+        try:
+            return await asyncio.wrap_future(self.future)
+        except asyncio.CancelledError:
+            self.cancel()
+            raise
+
+
+class Engine:
+    """
+    Engine: the bot of one game. workers > 1 searches the root moves in that many processes.
+    With log_stats every move is searched with a SearchStats, kept in last_stats and logged
+    on the connectFourEngine logger at INFO level. book= OpeningBook or path of a book file,
+    endgame= EndgameCache the search solves the last moves with, geometry= the board and rules of
+    the game, the book and the endgame cache have to be made for the same one.
+    search_async runs best_move on a thread of the engine, one search after the other.
+    ponder searches the replies of the opponent on that thread while the opponent thinks, best_move
+    stops it and plays the pondered move right away if it was searched as deep as the last move
+    """
+
+    def __init__(self, workers=1, table_size=transposition.DEFAULT_SIZE, log_stats=False, book=None,
+                 endgame=None, geometry=CLASSIC):
+        self.geometry = geometry
+        self.table = transposition.TranspositionTable(table_size)
+        self.ordering = move_ordering.HistoryOrdering(geometry)
+        self.executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+        self.log_stats = log_stats
+        self.last_stats = None
+        self.solver = None
+        # made by the first search_async, search is the last one started
+        self.thread = None
+        self.search = None
+        # pondering: the AsyncSearch while it runs, (depth, column, score) by ponder_key and the
+        # deepest depth the last timed search finished
+        self.ponder_search = None
+        self.ponder_results = {}
+        self.reached_depth = 0
+        # a book the engine opened itself is closed with the engine
+        self.own_book = isinstance(book, str)
+        self.book = OpeningBook(book) if self.own_book else book
+        self.endgame = endgame
+        if self.book is not None and self.book.geometry is not geometry:
+            book_geometry = self.book.geometry
+            self.close()
+            raise ValueError("the book is for %r, not %r" % (book_geometry, geometry))
+        if endgame is not None and endgame.geometry is not geometry:
+            self.close()
+            raise ValueError("the endgame cache is for %r, not %r" % (endgame.geometry, geometry))
+
+    """
+    best_move: the column the bot plays, searched to a fixed depth or for a time
+    @:params: position= Position or numpy board with the bot to move, depth= depth to search,
+    time_limit= milliseconds to think (iterative deepening), one of the two must be given,
+    stats= optional SearchStats to fill, stop= optional threading.Event that ends the search early,
+    progress= optional function called with (depth, column, score) after every finished depth
+    returns the column and its score
+    """
+    def best_move(self, position, depth=None, time_limit=None, stats=None, stop=None, progress=None):
+        if not isinstance(position, Position):
+            position = from_board(position, self.geometry)
+        if time_limit is None and depth is None:
+            raise ValueError("best_move needs a depth or a time_limit")
+        self.stop_pondering()
+        if self.book is not None:
+            entry = self.book.probe(position)
+            if entry is not None:
+                return entry
+        entry = self.ponder_hit(position, depth, time_limit)
+        if entry is not None:
+            if progress is not None:
+                progress(*entry)
+            if self.log_stats:
+                logger.info("column %s, score %s: pondered to depth %d", entry[1], entry[2], entry[0])
+            return entry[1], entry[2]
+        if time_limit is not None and self.reached_depth and ponder_key(position) in self.ponder_results:
+            # pondered but not deep enough: most of the tree is in the table, the depths up to the last
+            # move's go fast, and one more is enough to play at least as well as then
+            if depth is None or depth > self.reached_depth + 1:
+                depth = self.reached_depth + 1
+        if stats is None and self.log_stats:
+            stats = SearchStats()
+        self.table.new_search()
+        self.ordering.new_search()
+        if time_limit is not None:
+            def finished(depth_done, column, score):
+                # a won or lost position ends the deepening early, that says nothing about the time
+                if abs(score) < WIN_SCORE:
+                    self.reached_depth = depth_done
+                if progress is not None:
+                    progress(depth_done, column, score)
+            result = iterative_deepening(position, time_limit, self.table, depth, self.ordering, self.executor,
+                                         stats, self.endgame, stop, finished)
+        else:
+            if stats is not None:
+                stats.start_iteration(depth)
+            moves = len(position.moves)
+            try:
+                if self.endgame is not None and self.endgame.covers(position) and not is_terminal(position):
+                    result = self.endgame.best_move(position, WIN_SCORE, None, stop)
+                elif self.executor is not None:
+                    result = parallel_mini_max(position, depth, executor=self.executor, stats=stats, stop=stop)
+                else:
+                    result = mini_max(position, depth, -math.inf, math.inf, True, self.table, None, self.ordering,
+                                      stats, self.endgame, stop)
+            except SearchTimeout:
+                # stopped, take back the discs the search left on the position
+                while len(position.moves) > moves:
+                    undo_piece(position)
+                raise
+            if stats is not None:
+                stats.end_iteration(result[0], result[1])
+                stats.finish()
+            if progress is not None:
+                progress(depth, result[0], result[1])
+        if stats is not None:
+            self.last_stats = stats
+            if self.log_stats:
+                logger.info("column %s, score %s: %s", result[0], result[1], stats.summary())
+        return result
+
+    """
+    search_async: best_move on the search thread of the engine, the caller (a game loop) goes on
+    and looks at the AsyncSearch now and then. A numpy board is converted right away and can be
+    changed, a Position must be left alone until the search is done
+    @:params: position= Position or numpy board with the bot to move, depth, time_limit= like best_move,
+    progress= optional function called on the search thread with (depth, column, score)
+    returns the AsyncSearch
+    """
+    def search_async(self, position, depth=None, time_limit=None, progress=None):
+        if not isinstance(position, Position):
+            position = from_board(position, self.geometry)
+        if time_limit is None and depth is None:
+            raise ValueError("search_async needs a depth or a time_limit")
+        self.stop_pondering()
+        if self.thread is None:
+            self.thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix="connectFourEngine")
+        search = AsyncSearch(progress)
+        search.future = self.thread.submit(self.best_move, position, depth, time_limit, None, search.stop,
+                                           search.update)
+        self.search = search
+        return search
+
+    """
+    ponder: starts searching the replies of the opponent on the search thread (see ponder in
+    connectFourSearch.py), until the next best_move or stop_pondering. The table gets warm for the
+    position after any reply, and the one the opponent plays may even be searched deep enough
+    @:params: position= Position or numpy board with the opponent (PLAYER_PIECE) to move, it is copied
+    returns the AsyncSearch of the pondering
+    """
+    def ponder(self, position):
+        self.stop_pondering()
+        if isinstance(position, Position):
+            position = copy_position(position)
+        else:
+            position = from_board(position, self.geometry)
+        if self.thread is None:
+            self.thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix="connectFourEngine")
+        search = AsyncSearch()
+        self.ponder_results = {}
+        search.future = self.thread.submit(ponder, position, self.table, self.ordering, self.endgame, search.stop,
+                                           self.ponder_results)
+        self.ponder_search = search
+        return search
+
+    """
+    stop_pondering: stops pondering and waits until the search thread is free of it
+    """
+    def stop_pondering(self):
+        search = self.ponder_search
+        if search is not None:
+            self.ponder_search = None
+            search.cancel()
+            wait([search.future])
+
+    """
+    ponder_hit: the pondered result of the position, if it was searched deep enough: to depth
+    with a fixed depth, as deep as the last timed search got with a time_limit
+    returns (depth, column, score) or None
+    """
+    def ponder_hit(self, position, depth, time_limit):
+        entry = self.ponder_results.get(ponder_key(position))
+        if entry is None:
+            return None
+        needed = depth
+        if time_limit is not None:
+            needed = self.reached_depth if depth is None else min(self.reached_depth, depth)
+        if needed and entry[0] >= needed:
+            return entry
+        return None
+
+    """
+    perfect_move: the column the bot plays with the solver instead of the heuristic search,
+    it never loses a position that can be won or drawn but can take long early in the game
+    @:params: position= Position or numpy board with the bot to move
+    returns the column and its Solution
+    """
+    def perfect_move(self, position):
+        if not isinstance(position, Position):
+            position = from_board(position, self.geometry)
+        if self.solver is None:
+            self.solver = Solver(geometry=self.geometry)
+        return self.solver.best_column(position)
+
+    """
+    new_game: forget the positions of the last game
+    """
+    def new_game(self):
+        self.stop_pondering()
+        self.ponder_results = {}
+        self.reached_depth = 0
+        self.table.clear()
+        self.ordering = move_ordering.HistoryOrdering(self.geometry)
+        self.solver = None
+
+    """
+    close: stops the search thread, the worker processes and closes the book it opened
+    """
+    def close(self):
+        self.stop_pondering()
+        if self.thread is not None:
+            if self.search is not None:
+                self.search.cancel()
+            self.thread.shutdown(cancel_futures=True)
+            self.thread = None
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+        if self.own_book and self.book is not None:
+            self.book.close()
+            self.book = None
+
+
+"""
+best_move: best_move of a new Engine, for one off calls
+@:params: position= Position or numpy board with the bot to move, depth= depth to search,
+time_limit= milliseconds to think, stats= optional SearchStats to fill
+returns the column and its score
+"""
+def best_move(position, depth=None, time_limit=None, stats=None):
+    if not isinstance(position, Position):
+        position = from_board(position)
+    engine = Engine(table_size=1 << 16, geometry=position.geometry)
+    try:
+        return engine.best_move(position, depth, time_limit, stats)
+    finally:
+        engine.close()
@@ -0,0 +1,289 @@
+"""
+@author: Abinashi Singh
+Monte Carlo tree search (UCT) bot.
+
+mini_max needs score_position (evaluate_windiow) to guess the positions at the bottom of its
+search, MCTS doesn't guess: it plays the game to the end with random moves (a playout) from a
+position many times and counts how often each side wins. The tree grows one position per
+playout toward the moves that win most, UCT balances trying the moves that won so far against
+the ones that have been tried less. The more playouts, the stronger it plays, and it can be
+stopped at any time: best_move takes a number of playouts or a time in milliseconds.
+
+Playouts run on two integers like the solver (connectFourSolver.py), the discs of the player to
+move and the mask of all discs. A playout takes a winning move when there is one, otherwise a
+random column, which makes the results much closer to real play for almost no time.
+
+The tree is kept between moves: the next best_move starts from the position that was played,
+with all the playouts that were already done below it. With workers > 1 the search is root
+parallel, every worker process grows its own tree for the same position and the visits of the
+root moves are added up.
+
+    mcts = MCTS()
+    col, value = mcts.best_move(position, time_limit=1000)   # value: -1 lost ... 1 won, for the bot
+    col, value = mcts.best_move(position, playouts=20000)
+"""
+
+import math
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from connectFourBitboard import AI_PIECE, CLASSIC
+from connectFourSolver import winning_cells
+from connectFourSearch import wait_result
+
+# UCT exploration constant, sqrt(2) in theory
+EXPLORATION = 1.4
+# positions in the tree at most, after that playouts still run but the tree doesn't grow
+DEFAULT_MAX_NODES = 1 << 19
+# playouts between two looks at the clock and the stop event
+CHECK_EVERY = 16
+
+
+class Node:
+    """
+    Node: a position in the tree. column is the move that led to it, discs are the discs of the
+    player to move, mask all discs. wins counts for the player who made the move into this node
+    (a draw counts half), so the parent picks the child with the best wins / visits.
+    untried holds the columns that don't have a child yet. result is set for a finished game:
+    1 if the move into the node won, 0.5 for a full board
+    """
+    __slots__ = ("column", "parent", "children", "untried", "visits", "wins", "discs", "mask", "result")
+
+    def __init__(self, column, parent, discs, mask, result, geometry):
+        self.column = column
+        self.parent = parent
+        self.children = []
+        self.visits = 0
+        self.wins = 0.0
+        self.discs = discs
+        self.mask = mask
+        self.result = result
+        if result is None:
+            possible = (mask + geometry.bottom_mask) & geometry.full_mask
+            self.untried = [col for col in geometry.center_order if possible & geometry.column_masks[col]]
+        else:
+            self.untried = []
+
+
+"""
+playout: plays random moves until the game ends, a move that wins right away is always played
+@:params: discs= discs of the player to move, mask= all discs, geometry= the board, rng= random.Random
+returns the result for the player to move: 1 won, 0 lost, 0.5 draw
+"""
+def playout(discs, mask, geometry, rng):
+    bottom_mask = geometry.bottom_mask
+    full_mask = geometry.full_mask
+    column_masks = geometry.column_masks
+    columns = geometry.columns
+    draw = rng.random
+    result = 1.0
+    while True:
+        possible = (mask + bottom_mask) & full_mask
+        if not possible:
+            return 0.5
+        if winning_cells(discs, mask, geometry) & possible:
+            return result
+        while True:
+            move = possible & column_masks[int(draw() * columns)]
+            if move:
+                break
+        # the other player is to move
+        discs ^= mask
+        mask |= move
+        result = 1.0 - result
+
+
+class MCTS:
+    """
+    MCTS: the tree of one game and the search on it. root is the position of the last search,
+    playouts the number of playouts it ran. workers > 1 runs the searches root parallel in that
+    many processes, each with its own tree. Positions are of one geometry
+    """
+
+    def __init__(self, geometry=CLASSIC, exploration=EXPLORATION, workers=1, max_nodes=DEFAULT_MAX_NODES, seed=None):
+        self.geometry = geometry
+        self.exploration = exploration
+        self.max_nodes = max_nodes
+        self.rng = random.Random(seed)
+        self.root = None
+        self.nodes = 0
+        self.playouts = 0
+        self.workers = workers
+        self.executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+
+    """
+    close: stops the worker processes
+    """
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+            self.executor = None
+
+    """
+    new_node: a child position, checks whether the move into it ended the game
+    @:params: parent= Node, column= the move, returns the Node
+    """
+    def new_node(self, parent, column):
+        geometry = self.geometry
+        discs, mask = parent.discs, parent.mask
+        move = (mask + geometry.bottom_mask) & geometry.column_masks[column]
+        result = None
+        if winning_cells(discs, mask, geometry) & move:
+            result = 1.0
+        elif mask | move == geometry.full_mask:
+            result = 0.5
+        self.nodes += 1
+        return Node(column, parent, discs ^ mask, mask | move, result, geometry)
+
+    """
+    set_root: makes the position the root, the node of that position is taken out of the old tree
+    if it is there (the position after the last move and one or two more), a new tree otherwise
+    @:params: discs= discs of the player to move, mask= all discs
+    """
+    def set_root(self, discs, mask):
+        candidates = [] if self.root is None else [self.root]
+        for depth in range(3):
+            for node in candidates:
+                if node.discs == discs and node.mask == mask:
+                    node.parent = None
+                    node.column = None
+                    self.root = node
+                    # every playout added at most one node below the root
+                    self.nodes = min(self.nodes, node.visits + 1)
+                    return
+            candidates = [child for node in candidates for child in node.children]
+        self.root = Node(None, None, discs, mask, None, self.geometry)
+        self.nodes = 1
+
+    """
+    search: grows the tree of the position, playouts or time_limit (or both) bound the search
+    @:params: position= Position that is not over yet, piece= the player to move, playouts= number
+    of playouts, time_limit= milliseconds, stop= optional threading.Event that ends the search early
+    returns the root Node
+    """
+    def search(self, position, piece=AI_PIECE, playouts=None, time_limit=None, stop=None):
+        if playouts is None and time_limit is None:
+            raise ValueError("search needs a number of playouts or a time_limit")
+        self.set_root(position.pieces[piece], position.mask)
+        root = self.root
+        deadline = None if time_limit is None else time.perf_counter() + time_limit / 1000
+        geometry = self.geometry
+        rng = self.rng
+        exploration = self.exploration
+        log = math.log
+        sqrt = math.sqrt
+        done = 0
+        while playouts is None or done < playouts:
+            if done % CHECK_EVERY == 0 and done:
+                if deadline is not None and time.perf_counter() > deadline:
+                    break
+                if stop is not None and stop.is_set():
+                    break
+            # selection: down the tree along the best UCT child while every move has a child
+            node = root
+            while not node.untried and node.children:
+                factor = exploration * sqrt(log(node.visits))
+                best = None
+                best_value = -1.0
+                for child in node.children:
+                    value = child.wins / child.visits + factor / sqrt(child.visits)
+                    if value > best_value:
+                        best, best_value = child, value
+                node = best
+            # expansion: one new child, unless the game is over or the tree is full
+            if node.untried and self.nodes < self.max_nodes:
+                column = node.untried.pop(rng.randrange(len(node.untried)))
+                child = self.new_node(node, column)
+                node.children.append(child)
+                node = child
+            # simulation, result for the player to move at node
+            if node.result is not None:
+                result = 1.0 - node.result
+            else:
+                result = playout(node.discs, node.mask, geometry, rng)
+            # backpropagation, wins count for the player who moved into the node
+            while node is not None:
+                node.visits += 1
+                node.wins += 1.0 - result
+                result = 1.0 - result
+                node = node.parent
+            done += 1
+        self.playouts = done
+        return root
+
+    """
+    root_statistics: visits and wins of every root move
+    returns a dict column -> [visits, wins]
+    """
+    def root_statistics(self):
+        return {child.column: [child.visits, child.wins] for child in self.root.children}
+
+    """
+    best_move: the column with the most visits after a search, in a worker process each and
+    added up with workers > 1
+    @:params: position= Position that is not over yet, playouts, time_limit= like search (the
+    playouts are split between the workers), piece= the player to move, stop= optional threading.Event
+    returns the column and its value for that player: wins minus losses per playout, -1 to 1
+    """
+    def best_move(self, position, playouts=None, time_limit=None, piece=AI_PIECE, stop=None):
+        if self.executor is None:
+            self.search(position, piece, playouts, time_limit, stop)
+            statistics = self.root_statistics()
+        else:
+            share = None if playouts is None else -(-playouts // self.workers)
+            futures = [self.executor.submit(search_root, position, piece, share, time_limit, self.exploration,
+                                            self.max_nodes, self.rng.getrandbits(64))
+                       for worker in range(self.workers)]
+            statistics = {}
+            self.playouts = 0
+            try:
+                for future in futures:
+                    worker_statistics, worker_playouts = wait_result(future, stop)
+                    self.playouts += worker_playouts
+                    for column, (visits, wins) in worker_statistics.items():
+                        total = statistics.setdefault(column, [0, 0.0])
+                        total[0] += visits
+                        total[1] += wins
+            finally:
+                for future in futures:
+                    future.cancel()
+        # most visits, the center first if equal
+        order = {col: index for index, col in enumerate(self.geometry.center_order)}
+        column = min(statistics, key=lambda col: (-statistics[col][0], order[col]))
+        visits, wins = statistics[column]
+        return column, 2 * wins / visits - 1
+
+
+# the tree of a worker process, kept between the searches it runs
+_worker_tree = None
+
+
+"""
+search_root: one worker of a root parallel search, runs in a worker process. The tree of the
+worker is reused when the position follows the one it searched last
+@:params: position= Position, piece= the player to move, playouts, time_limit= like MCTS.search,
+exploration, max_nodes= like MCTS, seed= random seed of the worker for this search
+returns the root statistics and the playouts run
+"""
+def search_root(position, piece, playouts, time_limit, exploration, max_nodes, seed):
+    global _worker_tree
+    if _worker_tree is None or _worker_tree.geometry is not position.geometry:
+        _worker_tree = MCTS(position.geometry, exploration, max_nodes=max_nodes)
+    _worker_tree.rng.seed(seed)
+    _worker_tree.search(position, piece, playouts, time_limit)
+    return _worker_tree.root_statistics(), _worker_tree.playouts
+
+
+"""
+best_move: best_move of a new MCTS
+@:params: position= Position, playouts, time_limit= like MCTS.search, piece= the player to move,
+workers= processes to search with
+returns the column and its value
+"""
+def best_move(position, playouts=None, time_limit=None, piece=AI_PIECE, workers=1):
+    mcts = MCTS(position.geometry, workers=workers)
+    try:
+        return mcts.best_move(position, playouts, time_limit, piece)
+    finally:
+        mcts.close()
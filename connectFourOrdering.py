@@ -0,0 +1,128 @@
+"""
+@author: Abinashi Singh
+Move ordering for the alpha-beta search.
+
+Alpha-beta cuts the most when the best move is searched first. Walking the columns left to
+right is close to the worst order, the center columns are usually the strong ones and they
+come last. Two orderings can be given to mini_max:
+
+CenterOrdering: best column from the transposition table first, then center out.
+HistoryOrdering: same, plus killer moves per ply and a history table. A killer is a column
+that gave a cutoff at the same ply in a sibling node, the history table adds up how often
+dropping a disc in a cell gave a cutoff, weighted by the depth that was left.
+
+Both count the cutoffs and how many of them came from the first move searched, a well
+ordered search gets most of its cutoffs from the first move.
+"""
+
+from connectFourBitboard import AI_PIECE, CLASSIC
+
+# 3, 2, 4, 1, 5, 0, 6 on the classic board, other boards have their own geometry.center_order
+CENTER_ORDER = CLASSIC.center_order
+# killer moves remembered per ply
+KILLER_SLOTS = 2
+
+
+"""
+center_first: valid columns from the center out, with the best column of the transposition table first
+@:params: valid_location= valid columns, tt_column= column from the transposition table or None,
+center_order= the columns of the board from the center out
+returns the ordered columns
+"""
+def center_first(valid_location, tt_column=None, center_order=CENTER_ORDER):
+    ordered = [col for col in center_order if col in valid_location and col != tt_column]
+    if tt_column in valid_location:
+        ordered.insert(0, tt_column)
+    return ordered
+
+
+class CenterOrdering:
+    """
+    CenterOrdering: static center out order, plus the cutoff counters every ordering has.
+    """
+
+    def __init__(self):
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+
+    """
+    new_search: called before every bot move
+    """
+    def new_search(self):
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+
+    """
+    order: the order mini_max searches the columns in
+    @:params: position= position, valid_location= valid columns, tt_column= column from the
+    transposition table or None, piece= disc that is about to be dropped
+    returns the ordered columns
+    """
+    def order(self, position, valid_location, tt_column, piece):
+        return center_first(valid_location, tt_column, position.geometry.center_order)
+
+    """
+    cutoff: mini_max calls this when a column caused an alpha-beta cutoff
+    @:params: position= position (the disc is already taken back), col= column, depth= depth left,
+    index= how many columns were searched before this one, piece= disc that was dropped
+    """
+    def cutoff(self, position, col, depth, index, piece):
+        self.cutoffs += 1
+        if index == 0:
+            self.first_move_cutoffs += 1
+
+    """
+    first_move_cutoff_rate: share of the cutoffs that came from the first column searched
+    returns a number between 0 and 1
+    """
+    def first_move_cutoff_rate(self):
+        if self.cutoffs == 0:
+            return 0.0
+        return self.first_move_cutoffs / self.cutoffs
+
+
+class HistoryOrdering(CenterOrdering):
+    """
+    HistoryOrdering: transposition table column, then killer moves of the ply, then the rest by
+    history score (center out when the scores are equal). The tables are sized for the
+    geometry of the positions it orders.
+    """
+
+    def __init__(self, geometry=CLASSIC):
+        super().__init__()
+        # killers[ply] with ply = number of discs on the board
+        self.killers = [[None] * KILLER_SLOTS for ply in range(geometry.cells + 1)]
+        # history[piece][bit of the cell]
+        self.history = [[0] * geometry.bits for piece in range(AI_PIECE + 1)]
+
+    """
+    new_search: called before every bot move, old history counts half as much
+    """
+    def new_search(self):
+        super().new_search()
+        for scores in self.history:
+            for bit in range(len(scores)):
+                scores[bit] >>= 1
+
+    def order(self, position, valid_location, tt_column, piece):
+        heights = position.heights
+        scores = self.history[piece]
+        ordered = sorted((col for col in position.geometry.center_order if col in valid_location),
+                         key=lambda col: -scores[heights[col].bit_length() - 1])
+        # killers in front of the history order and the table column in front of everything
+        for killer in reversed(self.killers[len(position.moves)]):
+            if killer is not None and killer in valid_location:
+                ordered.remove(killer)
+                ordered.insert(0, killer)
+        if tt_column in valid_location:
+            ordered.remove(tt_column)
+            ordered.insert(0, tt_column)
+        return ordered
+
+    def cutoff(self, position, col, depth, index, piece):
+        super().cutoff(position, col, depth, index, piece)
+        killers = self.killers[len(position.moves)]
+        if killers[0] != col:
+            killers.insert(0, col)
+            killers.pop()
+        self.history[piece][position.heights[col].bit_length() - 1] += depth * depth
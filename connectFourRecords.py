@@ -0,0 +1,292 @@
+"""
+@author: Abinashi Singh
+Game records: a compact file of many games, written one game at a time and read back one game
+at a time.
+
+print_board only shows a game on the console, one numpy array of floats per move. A record here
+is the columns that were played, two to a byte (a column fits in 4 bits on boards of up to 16
+columns, a byte each on wider ones), with the result and optional metadata in front:
+
+    varint   number of moves
+    byte     bits 0-1 the piece that moved first, bits 2-3 the winner (EMPTY for none),
+             bit 4 set when the game is over (a draw is over with no winner)
+    varint   length of the metadata, then the metadata as compact json (0 and nothing without)
+    bytes    the columns
+
+A game of 30 moves without metadata takes 18 bytes. The file starts with a header with the
+geometry, so the records of a 9 x 7 connect five file replay on that board. RecordWriter appends
+to a file and flushes after every game, a crash loses at most the game that was being played.
+RecordReader reads the file in blocks and yields one GameRecord after the other, so a file of
+millions of games is never loaded at once.
+
+    with RecordWriter("games.c4r") as writer:
+        writer.write(moves, winner=AI_PIECE, metadata={"bot": "minimax:4"})
+    for record in read_records("games.c4r"):
+        for position in replay(record):
+            ...
+"""
+
+import json
+import os
+import struct
+from collections import namedtuple
+
+import connectFourBitboard as bitboard
+from connectFourBitboard import EMPTY, PLAYER_PIECE, AI_PIECE, CLASSIC
+
+MAGIC = b"C4GR"
+VERSION = 1
+# magic, version, rows, columns, connect
+HEADER = struct.Struct("<4sBBBB")
+# bytes read at a time
+BLOCK_SIZE = 1 << 16
+# set in the result byte when the game is over
+FINISHED = 1 << 4
+
+# one game: the columns played, the piece of the first move, the winner (EMPTY for a draw or a
+# game that isn't over), whether the game is over and the metadata dict (None if there is none)
+GameRecord = namedtuple("GameRecord", ["moves", "first_piece", "winner", "finished", "metadata"])
+
+# the two columns in a byte, low 4 bits first
+NIBBLES = [(byte & 15, byte >> 4) for byte in range(256)]
+
+
+"""
+write_varint: appends an int to a bytearray, 7 bits per byte, the high bit set on all but the last
+"""
+def write_varint(output, value):
+    while value >= 0x80:
+        output.append(value & 0x7f | 0x80)
+        value >>= 7
+    output.append(value)
+
+
+"""
+read_varint: reads an int written by write_varint
+@:params: data= bytes, offset= where it starts
+returns the int and the offset after it, raises IndexError if data ends in the middle of it
+"""
+def read_varint(data, offset):
+    value = 0
+    shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+"""
+packs_nibbles: True if the columns of the geometry are written two to a byte
+"""
+def packs_nibbles(geometry):
+    return geometry.columns <= 16
+
+
+"""
+encode_record: the bytes of one game
+@:params: record= GameRecord, geometry= the board
+returns bytearray
+"""
+def encode_record(record, geometry=CLASSIC):
+    moves = record.moves
+    for col in moves:
+        if not 0 <= col < geometry.columns:
+            raise ValueError("column %r is not on a board of %d columns" % (col, geometry.columns))
+    if record.first_piece not in (PLAYER_PIECE, AI_PIECE) or record.winner not in (EMPTY, PLAYER_PIECE, AI_PIECE):
+        raise ValueError("first_piece must be a piece and winner a piece or EMPTY")
+    output = bytearray()
+    write_varint(output, len(moves))
+    output.append(record.first_piece | record.winner << 2 | (FINISHED if record.finished else 0))
+    metadata = b""
+    if record.metadata:
+        metadata = json.dumps(record.metadata, separators=(",", ":")).encode()
+    write_varint(output, len(metadata))
+    output += metadata
+    if packs_nibbles(geometry):
+        for index in range(0, len(moves) - 1, 2):
+            output.append(moves[index] | moves[index + 1] << 4)
+        if len(moves) % 2:
+            output.append(moves[-1])
+    else:
+        output += bytes(moves)
+    return output
+
+
+"""
+decode_record: one game out of the bytes of a file
+@:params: data= bytes, offset= where the record starts, nibbles= packs_nibbles of the geometry
+returns the GameRecord and the offset after it, raises IndexError if data ends in the middle of it
+"""
+def decode_record(data, offset, nibbles=True):
+    count, offset = read_varint(data, offset)
+    result = data[offset]
+    length, offset = read_varint(data, offset + 1)
+    metadata = None
+    if length:
+        if offset + length > len(data):
+            raise IndexError("record goes on after the end of the data")
+        metadata = json.loads(bytes(data[offset:offset + length]))
+        offset += length
+    size = (count + 1) // 2 if nibbles else count
+    end = offset + size
+    if end > len(data):
+        raise IndexError("record goes on after the end of the data")
+    if nibbles:
+        moves = []
+        for byte in data[offset:end]:
+            moves.extend(NIBBLES[byte])
+        del moves[count:]
+    else:
+        moves = list(data[offset:end])
+    record = GameRecord(moves, result & 3, result >> 2 & 3, bool(result & FINISHED), metadata)
+    return record, end
+
+
+"""
+read_header: checks the header of a record file
+@:params: data= the first HEADER.size bytes, path= name of the file for the error message
+returns the geometry of the records
+"""
+def read_header(data, path):
+    if len(data) < HEADER.size:
+        raise ValueError("%s is not a game record file" % path)
+    magic, version, rows, columns, connect = HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("%s is not a game record file" % path)
+    return bitboard.get_geometry(rows, columns, connect)
+
+
+class RecordWriter:
+    """
+    RecordWriter: appends games to a record file, made with the header of the geometry if it
+    doesn't exist yet. An existing file has to be for the same geometry. games counts the games
+    written by this writer
+    """
+
+    def __init__(self, path, geometry=CLASSIC):
+        self.path = path
+        self.geometry = geometry
+        self.games = 0
+        if os.path.exists(path) and os.path.getsize(path):
+            with open(path, "rb") as existing:
+                file_geometry = read_header(existing.read(HEADER.size), path)
+            if file_geometry is not geometry:
+                raise ValueError("%s holds games of %r, not %r" % (path, file_geometry, geometry))
+            self.output = open(path, "ab")
+        else:
+            self.output = open(path, "wb")
+            self.output.write(HEADER.pack(MAGIC, VERSION, geometry.rows, geometry.columns, geometry.connect))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if self.output is not None:
+            self.output.close()
+            self.output = None
+
+    """
+    write: appends one game and flushes it to the file
+    @:params: moves= columns in the order they were played, winner= piece that won (EMPTY for a draw
+    or a game that isn't over), finished= the game is over, first_piece= piece of the first move,
+    metadata= optional dict that can be written as json
+    """
+    def write(self, moves, winner=EMPTY, finished=True, first_piece=PLAYER_PIECE, metadata=None):
+        record = GameRecord(list(moves), first_piece, winner, finished, metadata)
+        self.output.write(encode_record(record, self.geometry))
+        self.output.flush()
+        self.games += 1
+
+    """
+    write_position: appends the game that led to a bitboard position
+    @:params: position= Position, first_piece= piece of the first move, metadata= optional dict
+    """
+    def write_position(self, position, first_piece=PLAYER_PIECE, metadata=None):
+        self.write(position.moves, position.winner, bitboard.is_terminal(position), first_piece, metadata)
+
+
+class RecordReader:
+    """
+    RecordReader: the games of a record file one after the other, iterating over it reads the
+    file in blocks of BLOCK_SIZE bytes. geometry is the board of the games
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.input = open(path, "rb")
+        try:
+            self.geometry = read_header(self.input.read(HEADER.size), path)
+        except ValueError:
+            self.input.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.input.close()
+
+    def __iter__(self):
+        nibbles = packs_nibbles(self.geometry)
+        data = b""
+        offset = 0
+        while True:
+            block = self.input.read(BLOCK_SIZE)
+            # what is left of the last block and the new one
+            data = data[offset:] + block
+            offset = 0
+            while offset < len(data):
+                try:
+                    record, end = decode_record(data, offset, nibbles)
+                except IndexError:
+                    # the record goes on in the next block
+                    break
+                offset = end
+                yield record
+            if not block:
+                if offset < len(data):
+                    raise ValueError("%s ends in the middle of a game" % self.path)
+                return
+
+    """
+    positions: every game and the position it ended in
+    returns a generator of (GameRecord, Position)
+    """
+    def positions(self):
+        for record in self:
+            position = bitboard.from_moves(record.moves, record.first_piece, self.geometry)
+            yield record, position
+
+
+"""
+read_records: the games of a record file, one at a time
+@:params: path= the file
+returns a generator of GameRecord
+"""
+def read_records(path):
+    with RecordReader(path) as reader:
+        yield from reader
+
+
+"""
+replay: the position after every move of a game. It is the same Position every time, changed by
+one move, copy it (copy_position) to keep it
+@:params: record= GameRecord, geometry= the board of the game
+returns a generator of Position
+"""
+def replay(record, geometry=CLASSIC):
+    position = bitboard.create_position(geometry)
+    piece = record.first_piece
+    for col in record.moves:
+        bitboard.drop_piece(position, col, piece)
+        piece = PLAYER_PIECE + AI_PIECE - piece
+        yield position
@@ -0,0 +1,163 @@
+"""
+@author: Abinashi Singh
+Drawing of the board for the pygame games.
+
+draw_board used to draw all 42 blue squares and holes and then every disc on top of them, and
+the game loops called pygame.display.update() for the whole window after every event, even
+for every MOUSEMOTION. BoardRenderer draws the empty board once into a background surface and
+a red and a yellow disc into cell sized sprites. After that a move only blits the one cell that
+changed, the strip above the board is only drawn again when what it shows changes, and update()
+hands pygame only the rectangles that were drawn on. The games call update() once per frame
+and cap the frames with a pygame Clock, so moving the mouse doesn't take the CPU the bot needs.
+The window looks the same as before, pixel for pixel.
+
+    renderer = BoardRenderer(screen)
+    renderer.draw_board(board)
+    renderer.draw_hover(posx, RED)
+    renderer.update()
+"""
+
+import numpy as np
+import pygame
+
+from connectFourBitboard import ROW_COUNT, COLUMN_COUNT, EMPTY, PLAYER_PIECE, AI_PIECE
+
+# rgb values of the board and of the discs of both players
+BLUE = (0, 0, 200)
+BLACK = (0, 0, 0)
+RED = (255, 0, 0)
+YELLOW = (255, 255, 0)
+DISC_COLORS = {PLAYER_PIECE: RED, AI_PIECE: YELLOW}
+
+
+class BoardRenderer:
+    """
+    BoardRenderer: draws a numpy board and the strip above it on screen. The top row of
+    squaresize pixels is the strip, the board is below it, row 0 of the numpy board at the bottom.
+    background: the window with the empty board and a black strip
+    sprites[piece]: one cell of the board with the disc of that piece in it
+    drawn: copy of the board as it is on screen, None until the first draw_board
+    strip: what the strip shows, so drawing the same thing again is skipped
+    dirty: rectangles drawn on since the last update()
+    """
+
+    def __init__(self, screen, rows=ROW_COUNT, columns=COLUMN_COUNT, squaresize=100):
+        self.screen = screen
+        self.rows = rows
+        self.columns = columns
+        self.squaresize = squaresize
+        self.radius = int(squaresize/2 - 5)
+        self.width = columns * squaresize
+        self.height = (rows + 1) * squaresize
+        self.strip_rect = pygame.Rect(0, 0, self.width, squaresize)
+
+        # the same squares and holes as the old draw_board, only drawn once
+        self.background = pygame.Surface((self.width, self.height)).convert()
+        self.background.fill(BLACK)
+        for c in range(columns):
+            for r in range(rows):
+                pygame.draw.rect(self.background, BLUE, (c*squaresize, r*squaresize+squaresize, squaresize, squaresize))
+                pygame.draw.circle(self.background, BLACK, (int(c*squaresize+squaresize/2),
+                                                            int(r*squaresize+squaresize+squaresize/2)), self.radius)
+        # every cell looks the same, the sprites are made on the bottom left one
+        cell = self.cell_rect(0, 0)
+        self.sprites = {}
+        for piece, color in DISC_COLORS.items():
+            sprite = self.background.subsurface(cell).copy()
+            center = self.disc_center(0, 0)
+            pygame.draw.circle(sprite, color, (center[0] - cell.left, center[1] - cell.top), self.radius)
+            self.sprites[piece] = sprite
+
+        self.drawn = None
+        self.strip = None
+        self.dirty = []
+
+    """
+    cell_rect: the square of a cell on screen
+    @:params: row, col= cell of the numpy board, row 0 is the bottom row
+    """
+    def cell_rect(self, row, col):
+        return pygame.Rect(col*self.squaresize, self.height - (row+1)*self.squaresize, self.squaresize, self.squaresize)
+
+    """
+    disc_center: the center of the disc in a cell, where the old draw_board drew it
+    """
+    def disc_center(self, row, col):
+        return int(col*self.squaresize+self.squaresize/2), self.height - int(row*self.squaresize+self.squaresize/2)
+
+    """
+    draw_board: draws the cells that changed since the last call, the whole window the first time
+    @:params: board= the numpy board
+    """
+    def draw_board(self, board):
+        if self.drawn is None or self.drawn.shape != board.shape:
+            self.screen.blit(self.background, (0, 0))
+            self.dirty.append(self.screen.get_rect())
+            self.strip = None
+            self.drawn = np.zeros(board.shape)
+        for row, col in np.argwhere(board != self.drawn):
+            rect = self.cell_rect(row, col)
+            piece = board[row][col]
+            if piece == EMPTY:
+                self.screen.blit(self.background, rect, rect)
+            else:
+                self.screen.blit(self.sprites[piece], rect)
+            self.dirty.append(rect)
+        self.drawn = board.copy()
+
+    """
+    clear_strip: makes the strip black again
+    """
+    def clear_strip(self):
+        if self.strip is not None:
+            self.screen.fill(BLACK, self.strip_rect)
+            self.dirty.append(self.strip_rect)
+            self.strip = None
+
+    """
+    draw_hover: the disc of the player over the column the mouse is on
+    @:params: posx= x of the mouse, color= color of the disc, None only clears the strip
+    """
+    def draw_hover(self, posx, color):
+        if color is None:
+            self.clear_strip()
+            return
+        if self.strip == ("hover", posx, color):
+            return
+        self.clear_strip()
+        pygame.draw.circle(self.screen, color, (posx, int(self.squaresize/2)), self.radius)
+        self.dirty.append(self.strip_rect)
+        self.strip = ("hover", posx, color)
+
+    """
+    draw_status: a line of text in the strip, with a dim ring over a column if one is given
+    @:params: text= the text, column= the column or None, font= pygame font, color= color of the text
+    """
+    def draw_status(self, text, column, font, color=YELLOW):
+        if self.strip == ("status", text, column):
+            return
+        self.clear_strip()
+        if column is not None:
+            pygame.draw.circle(self.screen, (128, 128, 0), (int(column*self.squaresize+self.squaresize/2),
+                                                            int(self.squaresize/2)), self.radius, 3)
+        self.screen.blit(font.render(text, 1, color), (10, 10))
+        self.dirty.append(self.strip_rect)
+        self.strip = ("status", text, column)
+
+    """
+    draw_label: a rendered label on the strip, like the winner at the end of the game
+    @:params: label= surface rendered by a font, position= where its top left corner goes
+    """
+    def draw_label(self, label, position=(40, 10)):
+        self.screen.blit(label, position)
+        self.dirty.append(self.strip_rect)
+        # whatever comes next draws over the label
+        self.strip = ("label", label)
+
+    """
+    update: shows what was drawn since the last update, only those rectangles
+    """
+    def update(self):
+        if self.dirty:
+            pygame.display.update(self.dirty)
+            self.dirty = []
@@ -0,0 +1,443 @@
+"""
+@author: Abinashi Singh
+Alpha-beta search of connectFourAlphaBeta.py on the bitboard position.
+
+It lives in its own module, without pygame, so the worker processes of the parallel
+search (and the benchmark) can import it without opening a game window.
+
+mini_max: alpha-beta with transposition table, move ordering and an optional deadline. Before
+the columns of a node are searched, tactical_check plays a win in one at once, leaves only the
+block when the opponent threatens to win and scores a lost position without searching it
+iterative_deepening: depth 1, 2, 3... until the time for the move is up
+parallel_mini_max: the moves at the root are searched in worker processes
+ponder: searches the replies of the opponent while it is the opponent's turn
+
+All three take a stop event (threading.Event): once another thread sets it the search ends
+like it does at the deadline, so a search running in the background can be cancelled.
+"""
+
+import math
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+
+import connectFourBitboard as bitboard
+import connectFourTransposition as transposition
+import connectFourOrdering as move_ordering
+from connectFourStats import SearchStats
+from connectFourBitboard import PLAYER_PIECE, AI_PIECE
+# SearchTimeout lives in the solver, which ends its searches the same way
+from connectFourSolver import SearchTimeout, winning_cells, playable_cells, non_losing_moves
+
+# score of a won game, far above anything score_position gives
+WIN_SCORE = 10000000
+
+
+"""
+tactical_check: looks at the moves of a position before they are searched. A move that wins
+right away is played at once. If the opponent threatens to win, only the block is left, and a
+move right under a cell where the opponent would win is left out. If that leaves nothing (two
+threats, or every move lets the opponent win on top of it) the position is lost
+@:params: position= position that is not over, maximizingPlayer= True if the bot is to move,
+valid_location= the columns that would be searched
+returns (column, value, valid_location): value is the score and column the move when the position
+is decided (a lost position blocks one of the threats), otherwise value is None and valid_location
+only keeps the columns worth searching
+"""
+def tactical_check(position, maximizingPlayer, valid_location):
+    geometry = position.geometry
+    column_masks = geometry.column_masks
+    piece = AI_PIECE if maximizingPlayer else PLAYER_PIECE
+    discs = position.pieces[piece]
+    mask = position.mask
+    possible = playable_cells(mask, geometry)
+    wins = winning_cells(discs, mask, geometry) & possible
+    if wins:
+        column = next(col for col in geometry.center_order if wins & column_masks[col])
+        return column, WIN_SCORE if maximizingPlayer else -WIN_SCORE, valid_location
+    moves = non_losing_moves(discs, mask, geometry)
+    if not moves:
+        # the opponent wins with the next disc, whatever we play
+        threats = winning_cells(discs ^ mask, mask, geometry) & possible or possible
+        column = next(col for col in geometry.center_order if threats & column_masks[col])
+        return column, -WIN_SCORE if maximizingPlayer else WIN_SCORE, valid_location
+    return None, None, [col for col in valid_location if moves & column_masks[col]]
+
+
+# followed pseudocode from Wikipedia minMax
+"""
+mini_max: Minimax algorithm runs based on scores. It's a recursive function.
+It runs on the bitboard position (see connectFourBitboard.py), discs are dropped and
+taken back on the same position instead of copying the board at every node.
+With a transposition table, positions that were already searched deep enough are not searched
+again and the best column stored for the position is tried first. A position and its mirror
+share one entry, and in a symmetric position only one of two mirrored columns is searched.
+Columns are searched center out, or in the order of the given ordering (see connectFourOrdering.py)
+@:params: position: the current position, alpha, beta = score, maximizingPlayer= maximizer player,
+table= optional TranspositionTable, deadline= optional time.perf_counter() value,
+the search raises SearchTimeout once it is past it, ordering= optional CenterOrdering or HistoryOrdering,
+stats= optional SearchStats (see connectFourStats.py) that counts what the search did,
+endgame= optional EndgameCache (see connectFourEndgame.py), positions it covers are solved
+and scored like finished games, without a column, stop= optional threading.Event, the search
+raises SearchTimeout once it is set
+returns the winning score and column that gave that score
+"""
+def mini_max(position, depth,alpha, beta, maximizingPlayer, table=None, deadline=None, ordering=None, stats=None,
+             endgame=None, stop=None):
+
+    if deadline is not None and time.perf_counter() > deadline:
+        raise SearchTimeout()
+    if stop is not None and stop.is_set():
+        raise SearchTimeout()
+    if stats is not None:
+        stats.nodes += 1
+    terminal = bitboard.is_terminal(position)
+    if not terminal and endgame is not None and endgame.covers(position):
+        # the result is known, no need to search any deeper
+        if stats is not None:
+            stats.terminals += 1
+        return (None, endgame.value(position, maximizingPlayer, WIN_SCORE, deadline, stop))
+    if depth ==0 or terminal:
+        if terminal:
+            if stats is not None:
+                stats.terminals += 1
+            # if it's a bot's winning move, the position remembers who won with the last drop
+            if position.winner == AI_PIECE:
+                # none will take place of the column that produces the best score
+                return (None, WIN_SCORE)
+            elif position.winner == PLAYER_PIECE:
+                # none will take place of the column that produces the best score
+                return (None, -WIN_SCORE)
+            else:
+                return (None, 0)  #game is over
+        else: #when depth is 0
+            if stats is not None:
+                stats.leaves += 1
+            return (None, bitboard.score_position(position, AI_PIECE))
+
+    # in a symmetric position a column and its mirror column are worth the same
+    valid_location = bitboard.unique_moves(position, bitboard.get_valid_location(position))
+    # a win in one, a forced block or a lost position don't need the search of every column
+    column, value, valid_location = tactical_check(position, maximizingPlayer, valid_location)
+    if value is not None:
+        if stats is not None:
+            stats.tactical += 1
+        return column, value
+    tt_column = None
+    if table is not None:
+        # a position and its mirror share one entry, its column is the one of the canonical position
+        key, mirrored = bitboard.canonical_hash(position, position.geometry.zobrist_side if maximizingPlayer else 0)
+        alpha_original, beta_original = alpha, beta
+        entry = table.probe(key)
+        if stats is not None:
+            stats.tt_probes += 1
+        if entry is not None:
+            entry_depth, flag, entry_value, entry_column = entry
+            if mirrored:
+                entry_column = bitboard.mirror_column(entry_column, position.geometry)
+            if stats is not None:
+                stats.tt_hits += 1
+            if entry_depth >= depth:
+                if flag == transposition.EXACT:
+                    if stats is not None:
+                        stats.tt_cutoffs += 1
+                    return entry_column, entry_value
+                elif flag == transposition.LOWER_BOUND:
+                    alpha = max(alpha, entry_value)
+                else:
+                    beta = min(beta, entry_value)
+                if alpha >= beta:
+                    if stats is not None:
+                        stats.tt_cutoffs += 1
+                    return entry_column, entry_value
+            # best column of an earlier search goes first, it's the most likely cutoff
+            tt_column = entry_column
+
+    piece = AI_PIECE if maximizingPlayer else PLAYER_PIECE
+    if ordering is None:
+        valid_location = move_ordering.center_first(valid_location, tt_column, position.geometry.center_order)
+    else:
+        valid_location = ordering.order(position, valid_location, tt_column, piece)
+    # the first column searched is the best guess until something beats it
+    column = valid_location[0]
+    #     True and false below will help us switch between players
+    if maximizingPlayer:
+        value = -math.inf
+        for index, col in enumerate(valid_location):
+            bitboard.drop_piece(position, col, AI_PIECE)
+            # [1] because 1st index is giving the best score
+            new_score = mini_max(position,depth-1, alpha, beta, False, table, deadline, ordering, stats, endgame,
+                                 stop)[1]
+            bitboard.undo_piece(position)
+            if new_score > value:
+                value = new_score
+                column = col #which col gave you the best score
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                if ordering is not None:
+                    ordering.cutoff(position, col, depth, index, piece)
+                if stats is not None:
+                    stats.cutoff(depth, index)
+                break
+    else: # for minimizer
+        value = math.inf
+        for index, col in enumerate(valid_location):
+            bitboard.drop_piece(position, col, PLAYER_PIECE)
+            new_score =  mini_max(position, depth-1,alpha, beta, True, table, deadline, ordering, stats, endgame,
+                                  stop)[1]
+            bitboard.undo_piece(position)
+            if new_score < value:
+                value = new_score
+                column = col #which col gave you the best score
+            beta = min(beta, value)
+            if alpha >= beta:
+                if ordering is not None:
+                    ordering.cutoff(position, col, depth, index, piece)
+                if stats is not None:
+                    stats.cutoff(depth, index)
+                break
+
+    if table is not None:
+        if value <= alpha_original:
+            flag = transposition.UPPER_BOUND
+        elif value >= beta_original:
+            flag = transposition.LOWER_BOUND
+        else:
+            flag = transposition.EXACT
+        table.store(key, depth, flag, value,
+                    bitboard.mirror_column(column, position.geometry) if mirrored else column)
+    return column, value
+
+
+"""
+iterative_deepening: searches depth 1, 2, 3... until the time is up and returns the move of
+the deepest search that finished. Every search fills the transposition table, so the next one
+tries the best column of the previous one first. Depth 1 always finishes so there is always a move
+@:params: position: the current position, time_limit= milliseconds we may think,
+table= TranspositionTable (a new one is made if none is given), max_depth= deepest search,
+ordering= move ordering shared by all the depths (a new HistoryOrdering if none is given),
+executor= optional ProcessPoolExecutor, every depth is then searched with parallel_mini_max,
+stats= optional SearchStats, gets the nodes and time of every depth,
+endgame= optional EndgameCache for mini_max (the worker processes search without it),
+stop= optional threading.Event that ends the search early like the time limit,
+progress= optional function called with (depth, column, score) after every finished depth
+returns the column and score of the deepest finished search
+"""
+def iterative_deepening(position, time_limit, table=None, max_depth=None, ordering=None, executor=None,
+                        stats=None, endgame=None, stop=None, progress=None):
+    if table is None:
+        table = transposition.TranspositionTable()
+    if ordering is None:
+        ordering = move_ordering.HistoryOrdering(position.geometry)
+    deadline = time.perf_counter() + time_limit / 1000
+    if endgame is not None and endgame.covers(position) and not bitboard.is_terminal(position):
+        try:
+            # solved exactly, nothing to deepen
+            column, value = endgame.best_move(position, WIN_SCORE, deadline, stop)
+        except SearchTimeout:
+            # not solved in time, the depth 1 search below still gives a move
+            pass
+        else:
+            if stats is not None:
+                stats.start_iteration(1)
+                stats.end_iteration(column, value)
+                stats.finish()
+            if progress is not None:
+                progress(position.geometry.cells - position.mask.bit_count(), column, value)
+            return column, value
+    # no point searching deeper than the number of empty cells
+    empty_cells = position.geometry.cells - position.mask.bit_count()
+    if max_depth is None or max_depth > empty_cells:
+        max_depth = empty_cells
+    if stats is not None:
+        stats.start_iteration(1)
+    # without the endgame cache, its solves could take longer than the time for the move
+    column, value = mini_max(position, 1, -math.inf, math.inf, True, table, None, ordering, stats)
+    if stats is not None:
+        stats.end_iteration(column, value)
+    if progress is not None:
+        progress(1, column, value)
+    for depth in range(2, max_depth + 1):
+        # game is decided, a deeper search can't change the move
+        if abs(value) >= WIN_SCORE:
+            break
+        moves = len(position.moves)
+        if stats is not None:
+            stats.start_iteration(depth)
+        try:
+            if executor is None:
+                column, value = mini_max(position, depth, -math.inf, math.inf, True, table, deadline, ordering,
+                                         stats, endgame, stop)
+            else:
+                column, value = parallel_mini_max(position, depth, executor=executor, deadline=deadline,
+                                                  first_column=column, stats=stats, stop=stop)
+        except SearchTimeout:
+            # take back the discs the unfinished search left on the position
+            while len(position.moves) > moves:
+                bitboard.undo_piece(position)
+            if stats is not None:
+                stats.end_iteration(None, None, completed=False)
+            break
+        if stats is not None:
+            stats.end_iteration(column, value)
+        if progress is not None:
+            progress(depth, column, value)
+    if stats is not None:
+        stats.finish()
+    return column, value
+
+
+"""
+ponder: searches the position after every reply of the opponent, deeper and deeper, until it
+is stopped. Every depth goes over all the replies, the likely ones first (the order of the
+ordering), so whatever the opponent plays has been searched about as deep. The searches fill
+the transposition table, so the real search after the reply finds most of its tree there
+@:params: position= the current position with the opponent (PLAYER_PIECE) to move, it is changed
+while pondering and put back at the end, table= TranspositionTable shared with the real search,
+ordering= move ordering, endgame= optional EndgameCache, stop= threading.Event that ends pondering,
+results= dict that gets (depth, column, score) of the deepest finished depth of every reply,
+under the key of the position after the reply (ponder_key)
+returns results once stop is set or every reply is searched to the end
+"""
+def ponder(position, table, ordering=None, endgame=None, stop=None, results=None):
+    if results is None:
+        results = {}
+    if bitboard.is_terminal(position):
+        return results
+    if ordering is None:
+        ordering = move_ordering.HistoryOrdering(position.geometry)
+    # every reply, also both of two mirrored ones (they share their table entries anyway)
+    replies = ordering.order(position, bitboard.get_valid_location(position), None, PLAYER_PIECE)
+    moves = len(position.moves)
+    # replies that are still worth a deeper search
+    open_replies = list(replies)
+    depth = 0
+    try:
+        while open_replies:
+            depth += 1
+            for col in list(open_replies):
+                bitboard.drop_piece(position, col, PLAYER_PIECE)
+                empty_cells = position.geometry.cells - position.mask.bit_count()
+                if bitboard.is_terminal(position):
+                    # the opponent wins (or fills the board), nothing to search
+                    open_replies.remove(col)
+                elif endgame is not None and endgame.covers(position):
+                    results[ponder_key(position)] = (empty_cells,) + endgame.best_move(position, WIN_SCORE, None,
+                                                                                      stop)
+                    open_replies.remove(col)
+                else:
+                    column, value = mini_max(position, depth, -math.inf, math.inf, True, table, None, ordering,
+                                             None, endgame, stop)
+                    results[ponder_key(position)] = (depth, column, value)
+                    # decided, or searched to the end of the game
+                    if abs(value) >= WIN_SCORE or depth >= empty_cells:
+                        open_replies.remove(col)
+                bitboard.undo_piece(position)
+    except SearchTimeout:
+        pass
+    # take back the discs the stopped search left on the position
+    while len(position.moves) > moves:
+        bitboard.undo_piece(position)
+    return results
+
+
+"""
+ponder_key: key of a position in the results of ponder, the discs of the bot plus all discs
+"""
+def ponder_key(position):
+    return position.pieces[AI_PIECE] + position.mask
+
+
+"""
+search_root_move: one root move of parallel_mini_max, runs in a worker process.
+Every task gets its own transposition table and ordering so the result does not depend on
+which worker ran which moves before
+@:params: position= position before the move, col= root column, depth= depth of the whole search,
+alpha= best score the bot already has, deadline= optional time.perf_counter() value,
+count= also count the search with a SearchStats
+returns the score of the move and the SearchStats (None without count)
+"""
+def search_root_move(position, col, depth, alpha, deadline=None, count=False):
+    bitboard.drop_piece(position, col, AI_PIECE)
+    table = transposition.TranspositionTable(1 << 16)
+    stats = SearchStats() if count else None
+    value = mini_max(position, depth - 1, alpha, math.inf, False, table, deadline,
+                     move_ordering.HistoryOrdering(position.geometry), stats)[1]
+    return value, stats
+
+
+"""
+parallel_mini_max: same result as mini_max(position, depth, -inf, inf, True) but the root
+moves are searched on several cores. The first column is searched alone to get a good alpha
+(young brothers wait), then all the other columns at the same time with that alpha.
+A column only replaces the best one if it is strictly better, like in mini_max, so both give
+the same column
+@:params: position= the current position, depth= depth to search, workers= number of processes
+(used when no executor is given), executor= ProcessPoolExecutor to reuse between moves,
+deadline= optional time.perf_counter() value, first_column= column to search first,
+stats= optional SearchStats, the counters of all the workers are added to it,
+stop= optional threading.Event, once it is set the search stops waiting for the workers and
+raises SearchTimeout (a worker finishes the root move it is on)
+returns the column and score
+"""
+def parallel_mini_max(position, depth, workers=None, executor=None, deadline=None, first_column=None,
+                      stats=None, stop=None):
+    if depth == 0 or bitboard.is_terminal(position):
+        return mini_max(position, depth, -math.inf, math.inf, True, stats=stats)
+    if executor is None:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return parallel_mini_max(position, depth, executor=executor, deadline=deadline,
+                                     first_column=first_column, stats=stats, stop=stop)
+
+    count = stats is not None
+    if count:
+        # the root itself, the workers count from its children on
+        stats.nodes += 1
+    # the same tactical check as mini_max, so both search the same columns
+    column, value, valid_location = tactical_check(
+        position, True, bitboard.unique_moves(position, bitboard.get_valid_location(position)))
+    if value is not None:
+        if count:
+            stats.tactical += 1
+        return column, value
+    valid_location = move_ordering.center_first(valid_location, first_column, position.geometry.center_order)
+    column = valid_location[0]
+    value, worker_stats = wait_result(executor.submit(search_root_move, position, column, depth, -math.inf,
+                                                      deadline, count), stop)
+    if count:
+        stats.merge(worker_stats)
+    if value >= WIN_SCORE:
+        return column, value
+    futures = [(col, executor.submit(search_root_move, position, col, depth, value, deadline, count))
+               for col in valid_location[1:]]
+    try:
+        # same order as the serial search, so equal scores keep the earlier column
+        for col, future in futures:
+            new_score, worker_stats = wait_result(future, stop)
+            if count:
+                stats.merge(worker_stats)
+            if new_score > value:
+                value = new_score
+                column = col
+    finally:
+        for col, future in futures:
+            future.cancel()
+    return column, value
+
+
+# seconds between two looks at the stop event while waiting for a worker
+STOP_POLL = 0.02
+
+"""
+wait_result: result of a future of a worker, without a stop event it simply waits
+@:params: future= Future, stop= optional threading.Event
+returns the result, raises SearchTimeout once stop is set
+"""
+def wait_result(future, stop=None):
+    if stop is None:
+        return future.result()
+    while True:
+        try:
+            return future.result(timeout=STOP_POLL)
+        except TimeoutError:
+            if stop.is_set():
+                raise SearchTimeout()
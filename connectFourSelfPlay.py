@@ -0,0 +1,198 @@
+"""
+@author: Abinashi Singh
+Self-play runner: plays many games between two bots without a window, in worker processes,
+and writes one JSON line per game.
+
+    python connectFourSelfPlay.py --games 1000 --first minimax:4 --second random --output games.jsonl
+
+Bots:
+random      a random valid column, the "bot" of connectFour.py
+greedy      pick_best_move, the column with the best score after one move
+minimax:d   the alpha-beta mini_max of connectFourAlphaBeta.py at depth d
+mcts:n      Monte Carlo tree search (connectFourMCTS.py) with n playouts per move
+
+Every line has the columns played, the winner ("first", "second" or null for a draw),
+and for every move the seconds it took and the nodes the search visited (0 for random and greedy,
+the playouts for mcts).
+With --swap the bots change sides every other game. With --records the games are also written
+to a compact record file (connectFourRecords.py). Every record carries the names of both bots
+as metadata, which takes most of its size: about 48 bytes per game for minimax:2 against random.
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import connectFourBitboard as bitboard
+import connectFourTransposition as transposition
+import connectFourOrdering as move_ordering
+from connectFourBitboard import PLAYER_PIECE, AI_PIECE
+from connectFourMCTS import MCTS
+from connectFourRecords import RecordWriter
+from connectFourSearch import mini_max
+from connectFourStats import SearchStats
+
+
+"""
+random_move: a random valid column
+returns the column and the nodes searched
+"""
+def random_move(position, piece, rng, depth, table):
+    return rng.choice(bitboard.get_valid_location(position)), 0
+
+
+"""
+greedy_move: pick_best_move on the bitboard, the column with the best score after one move,
+a random column if no move scores above 0
+returns the column and the nodes searched
+"""
+def greedy_move(position, piece, rng, depth, table):
+    valid_location = bitboard.get_valid_location(position)
+    best_score = 0
+    best_col = rng.choice(valid_location)
+    for col in valid_location:
+        bitboard.drop_piece(position, col, piece)
+        score = bitboard.score_position(position, piece)
+        bitboard.undo_piece(position)
+        if score > best_score:
+            best_score = score
+            best_col = col
+    return best_col, 0
+
+
+"""
+minimax_move: alpha-beta search to a fixed depth. The search maximizes for AI_PIECE,
+so the player's piece takes the minimizing move
+returns the column and the nodes searched
+"""
+def minimax_move(position, piece, rng, depth, table):
+    stats = SearchStats()
+    table.new_search()
+    column, value = mini_max(position, depth, -math.inf, math.inf, piece == AI_PIECE, table, None,
+                             move_ordering.HistoryOrdering(), stats)
+    return column, stats.nodes
+
+
+"""
+mcts_move: Monte Carlo tree search with a number of playouts, table is the MCTS of the bot so the
+tree is kept between its moves
+returns the column and the playouts run
+"""
+def mcts_move(position, piece, rng, playouts, table):
+    column, value = table.best_move(position, playouts=playouts, piece=piece)
+    return column, table.playouts
+
+
+BOTS = {
+    "random": random_move,
+    "greedy": greedy_move,
+    "minimax": minimax_move,
+    "mcts": mcts_move,
+}
+
+
+"""
+parse_bot: "minimax:5" -> (minimax_move, 5)
+@:params: name= bot name from the command line
+returns the move function and the depth (the playouts for mcts)
+"""
+def parse_bot(name):
+    kind, _, depth = name.partition(":")
+    if kind not in BOTS:
+        raise ValueError("unknown bot %r, use one of %s" % (name, ", ".join(BOTS)))
+    if kind == "minimax" and not depth:
+        raise ValueError("minimax needs a depth, for example minimax:4")
+    if kind == "mcts" and not depth:
+        raise ValueError("mcts needs a number of playouts, for example mcts:5000")
+    return BOTS[kind], int(depth) if depth else 0
+
+
+"""
+play_game: plays one game, runs in a worker process
+@:params: game= number of the game, first, second= bot names, seed= random seed of the run,
+swap= switch sides on odd games
+returns the game record as a dict
+"""
+def play_game(game, first, second, seed, swap):
+    if swap and game % 2:
+        first, second = second, first
+    rng = random.Random(seed * 1000003 + game)
+    bots = {PLAYER_PIECE: parse_bot(first), AI_PIECE: parse_bot(second)}
+    tables = {}
+    for piece, (move, depth) in bots.items():
+        if move is mcts_move:
+            # the tree of the bot, kept for the whole game
+            tables[piece] = MCTS(seed=rng.getrandbits(32))
+        elif depth:
+            tables[piece] = transposition.TranspositionTable(1 << 16)
+    position = bitboard.create_position()
+    piece = PLAYER_PIECE
+    moves, times, nodes = [], [], []
+    while not bitboard.is_terminal(position):
+        move, depth = bots[piece]
+        start = time.perf_counter()
+        col, searched = move(position, piece, rng, depth, tables.get(piece))
+        times.append(round(time.perf_counter() - start, 6))
+        nodes.append(searched)
+        bitboard.drop_piece(position, col, piece)
+        moves.append(col)
+        piece = PLAYER_PIECE + AI_PIECE - piece
+    winner = None
+    if position.winner == PLAYER_PIECE:
+        winner = "first"
+    elif position.winner == AI_PIECE:
+        winner = "second"
+    return {"game": game, "first": first, "second": second, "moves": moves, "winner": winner,
+            "times": times, "nodes": nodes}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="connect four self-play")
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--first", default="minimax:4", help="bot that moves first")
+    parser.add_argument("--second", default="random", help="bot that moves second")
+    parser.add_argument("--swap", action="store_true", help="bots change sides every other game")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="JSONL file, standard output if left out")
+    parser.add_argument("--records", help="game record file the games are appended to")
+    args = parser.parse_args()
+    # fail before starting the workers if a bot name is wrong
+    parse_bot(args.first)
+    parse_bot(args.second)
+
+    output = open(args.output, "w") if args.output else sys.stdout
+    record_file = RecordWriter(args.records) if args.records else None
+    winners = {"first": PLAYER_PIECE, "second": AI_PIECE, None: bitboard.EMPTY}
+    start = time.perf_counter()
+    count = 0
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers) as executor:
+            games = range(args.games)
+            records = executor.map(play_game, games, [args.first] * args.games, [args.second] * args.games,
+                                   [args.seed] * args.games, [args.swap] * args.games,
+                                   chunksize=max(1, args.games // (args.workers * 8)))
+            # map gives the games back in order, every line is written as soon as its game is done
+            for record in records:
+                output.write(json.dumps(record) + "\n")
+                if record_file is not None:
+                    # the first bot always plays PLAYER_PIECE
+                    record_file.write(record["moves"], winners[record["winner"]],
+                                  metadata={"first": record["first"], "second": record["second"]})
+                count += 1
+    finally:
+        if output is not sys.stdout:
+            output.close()
+        if record_file is not None:
+            record_file.close()
+    elapsed = time.perf_counter() - start
+    print("%d games in %.1fs, %.0f games per minute" % (count, elapsed, count * 60 / elapsed), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,459 @@
+"""
+@author: Abinashi Singh
+Game server: many games at the same time over HTTP, the bot moves searched by a pool of
+worker processes.
+
+connectFourAlphaBeta.py plays one game per process with the board in module globals. The
+server keeps every game in a small GameSession (the bitboard position and a few flags) and
+answers JSON requests on an asyncio server, only the standard library is needed:
+
+    POST   /games              {"bot_first": false, "time_limit": 500}   new game
+    GET    /games/<id>                                                     the game
+    POST   /games/<id>/moves   {"column": 3}                               the player's move and the bot's reply
+    DELETE /games/<id>                                                     ends the game
+    GET    /metrics                                                        requests, latency, queue
+
+Every bot move is a job for the worker processes (iterative deepening on its own
+transposition table per worker). At most max_pending jobs are queued or running, a move
+over that is turned down with 503 and Retry-After before anything changes, so a busy server
+slows clients down instead of queueing without end. Every move has a deadline: a worker that
+only gets the job late searches for the time that is left, and a move that still misses it is
+replaced by a shallow search in the server so the game goes on.
+
+    python connectFourServer.py --port 8080 --workers 4
+    curl -X POST localhost:8080/games -d '{"bot_first": true}'
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import multiprocessing
+import os
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from http import HTTPStatus
+
+import connectFourBitboard as bitboard
+import connectFourTransposition as transposition
+from connectFourBitboard import EMPTY, PLAYER_PIECE, AI_PIECE
+from connectFourSearch import mini_max, iterative_deepening
+
+# milliseconds the bot thinks for a move unless the game asks for another time
+DEFAULT_TIME_LIMIT = 500
+# milliseconds from the request until the bot's move has to be there, queueing included
+DEFAULT_DEADLINE = 2000
+# the search stops this many milliseconds before the deadline, for the way back
+DEADLINE_MARGIN = 50
+# depth of the move made in the server when the workers miss the deadline
+FALLBACK_DEPTH = 2
+# seconds a game is kept without a request
+SESSION_TIMEOUT = 600
+# the latency percentiles are over the last requests of every endpoint
+LATENCY_WINDOW = 1000
+MAX_BODY = 4096
+TIME_LIMITS = (1, 10000)
+
+logger = logging.getLogger(__name__)
+
+# transposition table of a worker process, kept for all the moves it searches
+_table = None
+
+
+"""
+search_move: searches one bot move, runs in a worker process
+@:params: position= Position with the bot to move, time_limit= milliseconds to think,
+deadline= time.time() the move has to be done by
+returns the column and score, or None if the job started after the deadline
+"""
+def search_move(position, time_limit, deadline):
+    global _table
+    remaining = (deadline - time.time()) * 1000 - DEADLINE_MARGIN
+    if remaining <= 0:
+        return None
+    if _table is None:
+        _table = transposition.TranspositionTable(1 << 18)
+    _table.new_search()
+    return iterative_deepening(position, min(time_limit, remaining), _table)
+
+
+"""
+percentile: the value percent of the values are at or below, like in connectFourBenchmark.py
+"""
+def percentile(values, percent):
+    values = sorted(values)
+    rank = max(0, math.ceil(percent / 100 * len(values)) - 1)
+    return values[rank]
+
+
+class HTTPError(Exception):
+    """
+    HTTPError: ends a request with that status and {"error": message}
+    """
+
+    def __init__(self, status, message, headers=None):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.headers = headers or {}
+
+
+class GameSession:
+    """
+    GameSession: one game. position= the bitboard position (the player is PLAYER_PIECE, the bot
+    AI_PIECE), busy= a bot move is being searched, last_used= time.monotonic() of the last request
+    """
+    __slots__ = ("id", "position", "time_limit", "busy", "last_used")
+
+    def __init__(self, session_id, time_limit):
+        self.id = session_id
+        self.position = bitboard.create_position()
+        self.time_limit = time_limit
+        self.busy = False
+        self.last_used = time.monotonic()
+
+    """
+    state: the game as JSON, rows from the top like print_board, "." empty, "X" player, "O" bot
+    """
+    def state(self):
+        position = self.position
+        geometry = position.geometry
+        rows = []
+        for r in range(geometry.rows - 1, -1, -1):
+            row = ""
+            for c in range(geometry.columns):
+                bit = bitboard.cell_bit(r, c, geometry.column_height)
+                row += "X" if position.pieces[PLAYER_PIECE] & bit else "O" if position.pieces[AI_PIECE] & bit else "."
+            rows.append(row)
+        winner = {EMPTY: None, PLAYER_PIECE: "player", AI_PIECE: "bot"}[position.winner]
+        return {"id": self.id, "board": rows, "moves": list(position.moves),
+                "over": bitboard.is_terminal(position), "winner": winner}
+
+
+class EndpointMetrics:
+    """
+    EndpointMetrics: requests of one endpoint. count, errors= answers with a 5xx status,
+    statuses= count per status, latencies= seconds of the last LATENCY_WINDOW requests
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.statuses = {}
+        self.seconds = 0.0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+
+    def record(self, status, seconds):
+        self.count += 1
+        if status >= 500:
+            self.errors += 1
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        self.seconds += seconds
+        self.latencies.append(seconds)
+
+    """
+    as_dict: the numbers for /metrics, throughput over uptime seconds
+    """
+    def as_dict(self, uptime):
+        result = {"count": self.count, "errors": self.errors,
+                  "statuses": {str(status): count for status, count in sorted(self.statuses.items())},
+                  "requests_per_second": self.count / uptime if uptime else 0.0,
+                  "mean_ms": self.seconds / self.count * 1000 if self.count else 0.0}
+        if self.latencies:
+            for percent in (50, 90, 99):
+                result["p%d_ms" % percent] = percentile(self.latencies, percent) * 1000
+        return result
+
+
+class GameServer:
+    """
+    GameServer: the games and the worker pool behind the HTTP server. workers= processes that
+    search the bot moves, max_pending= bot moves queued or searched at the same time before new
+    ones get 503, deadline= milliseconds a bot move may take, max_games= games kept at the same time
+    """
+
+    def __init__(self, workers=None, max_pending=None, deadline=DEFAULT_DEADLINE, max_games=1000,
+                 time_limit=DEFAULT_TIME_LIMIT):
+        self.workers = workers or os.cpu_count()
+        self.max_pending = max_pending or self.workers * 4
+        self.deadline = deadline
+        self.max_games = max_games
+        self.time_limit = time_limit
+        # workers are started when the first moves come in, a forked worker would keep the sockets
+        # of the connections open at that moment (and the clients waiting), spawned ones start clean
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        self.sessions = {}
+        self.pending = 0
+        self.rejected = 0
+        self.deadline_misses = 0
+        self.move_latencies = deque(maxlen=LATENCY_WINDOW)
+        self.metrics = {}
+        self.started = time.monotonic()
+        self.server = None
+
+    """
+    start: starts the worker processes, so the first moves don't wait for them, then listens on
+    host and port and starts dropping idle games
+    """
+    async def start(self, host="127.0.0.1", port=8080):
+        # a worker is only started when no other one is free, so keep them all busy for a moment
+        await asyncio.gather(*[asyncio.wrap_future(self.executor.submit(time.sleep, 0.1))
+                               for worker in range(self.workers)])
+        self.server = await asyncio.start_server(self.handle_connection, host, port)
+        self.cleaner = asyncio.get_running_loop().create_task(self.drop_idle_sessions())
+        return self.server
+
+    """
+    close: stops listening and the worker processes
+    """
+    async def close(self):
+        if self.server is not None:
+            self.cleaner.cancel()
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+        self.executor.shutdown(cancel_futures=True)
+
+    async def drop_idle_sessions(self):
+        while True:
+            await asyncio.sleep(SESSION_TIMEOUT / 10)
+            oldest = time.monotonic() - SESSION_TIMEOUT
+            for session_id in [key for key, session in self.sessions.items()
+                               if session.last_used < oldest and not session.busy]:
+                del self.sessions[session_id]
+
+    """
+    handle_connection: reads HTTP/1.1 requests from one client, keep-alive included
+    """
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                start = time.perf_counter()
+                keep_alive = False
+                endpoint = "invalid"
+                try:
+                    method, target, version = line.decode("latin-1").split()
+                    headers = {}
+                    while True:
+                        header = await reader.readline()
+                        if header in (b"\r\n", b"\n", b""):
+                            break
+                        name, _, value = header.decode("latin-1").partition(":")
+                        headers[name.strip().lower()] = value.strip()
+                    keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                    length = int(headers.get("content-length", 0))
+                    if length > MAX_BODY:
+                        keep_alive = False
+                        raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "body too large")
+                    body = await reader.readexactly(length) if length else b""
+                    endpoint, handler, args = self.route(method, target.split("?")[0])
+                    status, payload = await handler(*args, body)
+                    extra = {}
+                except HTTPError as error:
+                    status, payload, extra = error.status, {"error": error.message}, error.headers
+                except (ValueError, TypeError):
+                    keep_alive = False
+                    status, payload, extra = HTTPStatus.BAD_REQUEST, {"error": "bad request"}, {}
+                except Exception:
+                    logger.exception("%s failed", endpoint)
+                    keep_alive = False
+                    status, payload, extra = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "internal error"}, {}
+                self.write_response(writer, status, payload, extra, keep_alive)
+                await writer.drain()
+                self.metrics.setdefault(endpoint, EndpointMetrics()).record(status, time.perf_counter() - start)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    def write_response(self, writer, status, payload, headers, keep_alive):
+        status = HTTPStatus(status)
+        body = json.dumps(payload).encode()
+        head = ["HTTP/1.1 %d %s" % (status.value, status.phrase), "Content-Type: application/json",
+                "Content-Length: %d" % len(body), "Connection: %s" % ("keep-alive" if keep_alive else "close")]
+        head += ["%s: %s" % item for item in headers.items()]
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+
+    """
+    route: the handler of a request
+    returns the endpoint name for the metrics, the handler and its arguments before the body
+    """
+    def route(self, method, path):
+        parts = [part for part in path.split("/") if part]
+        if parts == ["games"]:
+            if method == "POST":
+                return "POST /games", self.create_game, ()
+        elif len(parts) == 2 and parts[0] == "games":
+            if method == "GET":
+                return "GET /games/<id>", self.get_game, (parts[1],)
+            if method == "DELETE":
+                return "DELETE /games/<id>", self.delete_game, (parts[1],)
+        elif len(parts) == 3 and parts[0] == "games" and parts[2] == "moves":
+            if method == "POST":
+                return "POST /games/<id>/moves", self.play_move, (parts[1],)
+        elif parts == ["metrics"]:
+            if method == "GET":
+                return "GET /metrics", self.get_metrics, ()
+        else:
+            raise HTTPError(HTTPStatus.NOT_FOUND, "no such endpoint")
+        raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, "method not allowed")
+
+    def session(self, session_id):
+        session = self.sessions.get(session_id)
+        if session is None:
+            raise HTTPError(HTTPStatus.NOT_FOUND, "no such game")
+        session.last_used = time.monotonic()
+        return session
+
+    """
+    check_capacity: raises 503 if the workers have max_pending bot moves already
+    """
+    def check_capacity(self):
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise HTTPError(HTTPStatus.SERVICE_UNAVAILABLE, "too many moves in the queue",
+                            {"Retry-After": str(max(1, self.deadline // 1000))})
+
+    async def create_game(self, body):
+        request = json.loads(body or b"{}")
+        if not isinstance(request, dict):
+            raise ValueError("not an object")
+        time_limit = int(request.get("time_limit", self.time_limit))
+        if not TIME_LIMITS[0] <= time_limit <= TIME_LIMITS[1]:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "time_limit must be %d to %d ms" % TIME_LIMITS)
+        if len(self.sessions) >= self.max_games:
+            raise HTTPError(HTTPStatus.SERVICE_UNAVAILABLE, "too many games", {"Retry-After": "10"})
+        bot_first = bool(request.get("bot_first", False))
+        if bot_first:
+            self.check_capacity()
+        session = GameSession(uuid.uuid4().hex, time_limit)
+        self.sessions[session.id] = session
+        state = {}
+        if bot_first:
+            state = await self.bot_move(session)
+        state.update(session.state())
+        return HTTPStatus.CREATED, state
+
+    async def get_game(self, session_id, body):
+        return HTTPStatus.OK, self.session(session_id).state()
+
+    async def delete_game(self, session_id, body):
+        session = self.session(session_id)
+        del self.sessions[session.id]
+        return HTTPStatus.OK, {"id": session.id}
+
+    """
+    play_move: the player's column and, if the game goes on, the bot's reply
+    """
+    async def play_move(self, session_id, body):
+        session = self.session(session_id)
+        request = json.loads(body or b"{}")
+        if not isinstance(request, dict):
+            raise ValueError("not an object")
+        column = request.get("column")
+        position = session.position
+        if session.busy:
+            raise HTTPError(HTTPStatus.CONFLICT, "the bot is still moving")
+        if bitboard.is_terminal(position):
+            raise HTTPError(HTTPStatus.CONFLICT, "the game is over")
+        # json true and false are ints to isinstance, they are not columns
+        if type(column) is not int or not 0 <= column < position.geometry.columns \
+                or not bitboard.is_valid_location(position, column):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "column is not a valid move")
+        # turned down before the move is made, so the client can send it again
+        self.check_capacity()
+        bitboard.drop_piece(position, column, PLAYER_PIECE)
+        state = {}
+        if not bitboard.is_terminal(position):
+            state = await self.bot_move(session)
+        state.update(session.state())
+        return HTTPStatus.OK, state
+
+    """
+    bot_move: searches the bot's move in the worker pool and plays it, within the deadline
+    returns {"bot_column": column, "score": score, "search_ms": milliseconds, "fallback": True if
+    the deadline was missed}
+    """
+    async def bot_move(self, session):
+        session.busy = True
+        start = time.perf_counter()
+        result = None
+        try:
+            future = self.executor.submit(search_move, session.position, session.time_limit,
+                                          time.time() + self.deadline / 1000)
+            # the job counts until a worker is done with it, a move that missed the deadline
+            # still holds its worker
+            self.pending += 1
+            loop = asyncio.get_running_loop()
+            future.add_done_callback(lambda done: loop.call_soon_threadsafe(self.job_done))
+            try:
+                result = await asyncio.wait_for(asyncio.wrap_future(future), self.deadline / 1000)
+            except asyncio.TimeoutError:
+                pass
+        finally:
+            session.busy = False
+        fallback = result is None
+        if fallback:
+            # still a sensible move, a shallow search takes well under a millisecond
+            self.deadline_misses += 1
+            result = mini_max(session.position, FALLBACK_DEPTH, -math.inf, math.inf, True)
+        column, score = result
+        bitboard.drop_piece(session.position, column, AI_PIECE)
+        seconds = time.perf_counter() - start
+        self.move_latencies.append(seconds)
+        return {"bot_column": column, "score": score, "search_ms": round(seconds * 1000, 1), "fallback": fallback}
+
+    """
+    job_done: a bot move left the worker pool, called on the event loop
+    """
+    def job_done(self):
+        self.pending -= 1
+
+    async def get_metrics(self, body):
+        uptime = time.monotonic() - self.started
+        moves = {"pending": self.pending, "max_pending": self.max_pending, "rejected": self.rejected,
+                 "deadline_misses": self.deadline_misses, "workers": self.workers}
+        if self.move_latencies:
+            for percent in (50, 90, 99):
+                moves["p%d_ms" % percent] = percentile(self.move_latencies, percent) * 1000
+        return HTTPStatus.OK, {"uptime": uptime, "games": len(self.sessions), "bot_moves": moves,
+                               "endpoints": {endpoint: metrics.as_dict(uptime)
+                                             for endpoint, metrics in sorted(self.metrics.items())}}
+
+
+async def serve(args):
+    server = GameServer(args.workers, args.max_pending, args.deadline, args.max_games, args.time_limit)
+    listener = await server.start(args.host, args.port)
+    print("listening on %s:%d" % (args.host, args.port))
+    try:
+        await listener.serve_forever()
+    finally:
+        await server.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="connect four game server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="processes that search the bot moves")
+    parser.add_argument("--max-pending", type=int, help="bot moves queued before 503, 4 per worker by default")
+    parser.add_argument("--deadline", type=int, default=DEFAULT_DEADLINE, help="milliseconds for a bot move")
+    parser.add_argument("--time-limit", type=int, default=DEFAULT_TIME_LIMIT, help="milliseconds the bot thinks")
+    parser.add_argument("--max-games", type=int, default=1000)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
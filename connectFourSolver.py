@@ -0,0 +1,311 @@
+"""
+@author: Abinashi Singh
+Perfect play solver.
+
+mini_max looks a few moves ahead and guesses the rest with score_position, the solver
+searches until the end of the game and gives the exact result of a position: who wins
+(or a draw) and after how many moves, when both sides play perfectly.
+
+It is a negamax on two integers, the discs of the player to move and the mask of all discs,
+in the same bit layout as connectFourBitboard.py. It only searches moves that don't give
+the opponent an immediate win (and only the block when the opponent threatens to win),
+tries the moves that make the most threats first, and keeps an upper bound for every
+position it searched. solve() narrows the score down with null window searches
+(alpha = beta - 1), which cut much more than one search with the full window.
+
+Scores are the usual ones for connect four solvers: 0 is a draw, a win with the k-th last
+disc of the player that wins scores k, so a faster win scores more, a loss is negative.
+
+    solution = solve(position)          # the bot (AI_PIECE) is to move
+    solution.outcome, solution.moves    # "win", 7 -> the bot wins with the 7th disc from now
+    column, solution = best_column(position)
+
+solve_score takes a deadline and a stop event like mini_max and raises SearchTimeout when one
+of them ends it, so a solve inside a search (the endgame cache) can't go past the time of the move.
+"""
+
+import time
+from collections import namedtuple
+
+from connectFourBitboard import AI_PIECE, CLASSIC, mirror, mirror_column
+
+# of the classic board, a Solver for another geometry uses the ones of the geometry
+CELLS = CLASSIC.cells
+BOTTOM_MASK = CLASSIC.bottom_mask
+# cells of every column, so a move can be picked out of a mask of moves
+COLUMN_MASKS = CLASSIC.column_masks
+# positions kept in the table before it is emptied
+DEFAULT_TABLE_SIZE = 1 << 22
+# nodes between two looks at the deadline and the stop event
+CHECK_EVERY = 256
+
+# outcome for the player to move, moves= discs still to be dropped (both players) until the game ends
+Solution = namedtuple("Solution", ["score", "outcome", "moves"])
+
+
+"""
+SearchTimeout: raised inside mini_max or the solver when the time for the move is up or the
+search was stopped
+"""
+class SearchTimeout(Exception):
+    pass
+
+
+"""
+winning_cells: empty cells where the player would get four (or connect) in a row
+@:params: discs= discs of the player, mask= all discs, geometry= the board
+returns the mask of those cells
+"""
+def winning_cells(discs, mask, geometry=CLASSIC):
+    if geometry.connect != 4:
+        return winning_cells_n(discs, mask, geometry)
+    height = geometry.column_height
+    # vertical: three on top of each other
+    cells = (discs << 1) & (discs << 2) & (discs << 3)
+    # horizontal and both diagonals, the empty cell can be at either end or in between
+    for shift in (height, height - 1, height + 1):
+        pair = (discs << shift) & (discs << 2 * shift)
+        cells |= pair & (discs << 3 * shift)
+        cells |= pair & (discs >> shift)
+        pair = (discs >> shift) & (discs >> 2 * shift)
+        cells |= pair & (discs << shift)
+        cells |= pair & (discs >> 3 * shift)
+    return cells & (geometry.full_mask ^ mask)
+
+
+"""
+winning_cells_n: winning_cells for any connect, the empty cell at every place of the window
+"""
+def winning_cells_n(discs, mask, geometry):
+    connect = geometry.connect
+    cells = 0
+    for shift in geometry.directions:
+        for empty in range(connect):
+            line = -1
+            for index in range(connect):
+                if index < empty:
+                    line &= discs << (empty - index) * shift
+                elif index > empty:
+                    line &= discs >> (index - empty) * shift
+            cells |= line
+    return cells & (geometry.full_mask ^ mask)
+
+
+"""
+playable_cells: the cell every column that is not full would take next
+"""
+def playable_cells(mask, geometry=CLASSIC):
+    return (mask + geometry.bottom_mask) & geometry.full_mask
+
+
+"""
+non_losing_moves: moves that don't let the opponent win on the next move.
+If the opponent threatens one cell it has to be blocked, two threats can't be blocked
+@:params: discs= discs of the player to move, mask= all discs, geometry= the board
+returns the mask of those moves, 0 if every move loses
+"""
+def non_losing_moves(discs, mask, geometry=CLASSIC):
+    possible = playable_cells(mask, geometry)
+    opponent_wins = winning_cells(discs ^ mask, mask, geometry)
+    forced = possible & opponent_wins
+    if forced:
+        if forced & (forced - 1):
+            return 0
+        possible = forced
+    # and don't play right under a cell where the opponent would win
+    return possible & ~(opponent_wins >> 1)
+
+
+class Solver:
+    """
+    Solver: negamax with the table of upper bounds. table maps the position key
+    (discs + mask, different for every position and player to move) to the bound, a position
+    and its mirror share the entry of the smaller key.
+    nodes counts the positions searched, the table is kept between solve calls.
+    deadline and stop are the ones of the solve_score that is running.
+    Solves the positions of one geometry, the classic board by default
+    """
+
+    def __init__(self, table_size=DEFAULT_TABLE_SIZE, geometry=CLASSIC):
+        self.table = {}
+        self.table_size = table_size
+        self.nodes = 0
+        self.deadline = None
+        self.stop = None
+        self.geometry = geometry
+        self.cells = geometry.cells
+
+    """
+    negamax: score of the position for the player to move, if it is between alpha and beta.
+    Otherwise a bound: at most alpha or at least beta. The player to move can't win right away
+    @:params: discs= discs of the player to move, mask= all discs, moves= discs on the board
+    returns the score or the bound
+    """
+    def negamax(self, discs, mask, moves, alpha, beta):
+        self.nodes += 1
+        if self.nodes % CHECK_EVERY == 0:
+            if self.deadline is not None and time.perf_counter() > self.deadline:
+                raise SearchTimeout()
+            if self.stop is not None and self.stop.is_set():
+                raise SearchTimeout()
+        geometry = self.geometry
+        cells = self.cells
+        possible = non_losing_moves(discs, mask, geometry)
+        if not possible:
+            # every move lets the opponent win with their next disc
+            return -((cells - moves) // 2)
+        if moves >= cells - 2:
+            # neither player can win with the last two discs
+            return 0
+
+        # can't lose faster than in two moves, the opponent can't win right away
+        lowest = -((cells - 2 - moves) // 2)
+        if alpha < lowest:
+            alpha = lowest
+            if alpha >= beta:
+                return alpha
+        # can't win with the next disc either, we would have done that already
+        highest = (cells - 1 - moves) // 2
+        key = discs + mask
+        mirrored = mirror(key, geometry)
+        symmetric = mirrored == key
+        if mirrored < key:
+            key = mirrored
+        bound = self.table.get(key)
+        if bound is not None:
+            highest = bound
+        if beta > highest:
+            beta = highest
+            if alpha >= beta:
+                return beta
+
+        # moves that make the most new threats first, center first if equal
+        ordered = []
+        column_masks = geometry.column_masks
+        for index, col in enumerate(geometry.center_order):
+            move = possible & column_masks[col]
+            # a symmetric position only needs one of a column and its mirror column
+            if move and not (symmetric and col > mirror_column(col, geometry)):
+                threats = winning_cells(discs | move, mask, geometry).bit_count()
+                ordered.append((-threats, index, move))
+        ordered.sort()
+
+        for threats, index, move in ordered:
+            # after the move it is the opponent's turn, their discs are the rest of the mask
+            score = -self.negamax(discs ^ mask, mask | move, moves + 1, -beta, -alpha)
+            if score >= beta:
+                return score
+            if score > alpha:
+                alpha = score
+
+        if len(self.table) >= self.table_size:
+            self.table.clear()
+        self.table[key] = alpha
+        return alpha
+
+    """
+    solve_score: exact score for the player to move, narrowed down with null window searches
+    @:params: discs= discs of the player to move, mask= all discs, deadline= optional time.perf_counter()
+    value, stop= optional threading.Event. The table only gets finished positions, so it stays right
+    when the solve is ended early
+    returns the score, raises SearchTimeout once the deadline is past or stop is set
+    """
+    def solve_score(self, discs, mask, deadline=None, stop=None):
+        moves = mask.bit_count()
+        if winning_cells(discs, mask, self.geometry) & playable_cells(mask, self.geometry):
+            return (self.cells + 1 - moves) // 2
+        self.deadline = deadline
+        self.stop = stop
+        try:
+            return self.narrow(discs, mask, moves)
+        finally:
+            self.deadline = None
+            self.stop = None
+
+    """
+    narrow: the null window searches of solve_score
+    """
+    def narrow(self, discs, mask, moves):
+        low = -((self.cells - moves) // 2)
+        high = (self.cells + 1 - moves) // 2
+        while low < high:
+            middle = low + (high - low) // 2
+            # try around 0 first, most positions are close to a draw
+            if middle <= 0 and low // 2 < middle:
+                middle = low // 2
+            elif middle >= 0 and high // 2 > middle:
+                middle = high // 2
+            score = self.negamax(discs, mask, moves, middle, middle + 1)
+            if score <= middle:
+                high = score
+            else:
+                low = score
+        return low
+
+    """
+    solve: exact result of a position
+    @:params: position= Position, piece= the player to move
+    returns a Solution for that player
+    """
+    def solve(self, position, piece=AI_PIECE):
+        score = self.solve_score(position.pieces[piece], position.mask)
+        return describe(score, position.mask.bit_count(), self.cells)
+
+    """
+    best_column: the column with the best exact result for the player to move
+    @:params: position= Position, piece= the player to move
+    returns the column and the Solution of the position
+    """
+    def best_column(self, position, piece=AI_PIECE):
+        geometry = self.geometry
+        discs = position.pieces[piece]
+        mask = position.mask
+        possible = playable_cells(mask, geometry)
+        best = None
+        best_score = None
+        symmetric = mirror(discs + mask, geometry) == discs + mask
+        for col in geometry.center_order:
+            move = possible & geometry.column_masks[col]
+            if not move or symmetric and col > mirror_column(col, geometry):
+                continue
+            if winning_cells(discs, mask, geometry) & move:
+                best, best_score = col, (self.cells + 1 - mask.bit_count()) // 2
+                break
+            score = -self.solve_score(discs ^ mask, mask | move)
+            if best_score is None or score > best_score:
+                best, best_score = col, score
+        return best, describe(best_score, mask.bit_count(), self.cells)
+
+
+"""
+describe: turns a score into the outcome and the discs left until the game ends
+@:params: score= solver score, moves= discs on the board, cells= cells of the board
+returns Solution
+"""
+def describe(score, moves, cells=CELLS):
+    if score == 0:
+        return Solution(score, "draw", cells - moves)
+    # the winning disc is number cells + 2 - 2 * |score| or the one before, whichever one the winner drops
+    winning_disc = cells + 2 - 2 * abs(score)
+    winner_parity = (moves + 1) % 2 if score > 0 else moves % 2
+    if winning_disc % 2 != winner_parity:
+        winning_disc -= 1
+    return Solution(score, "win" if score > 0 else "loss", winning_disc - moves)
+
+
+"""
+solve: exact result of a position with a new Solver
+@:params: position= Position, piece= the player to move (the bot by default)
+returns Solution
+"""
+def solve(position, piece=AI_PIECE):
+    return Solver(geometry=position.geometry).solve(position, piece)
+
+
+"""
+best_column: best_column of a new Solver
+@:params: position= Position, piece= the player to move (the bot by default)
+returns the column and the Solution
+"""
+def best_column(position, piece=AI_PIECE):
+    return Solver(geometry=position.geometry).best_column(position, piece)
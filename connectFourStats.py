@@ -0,0 +1,170 @@
+"""
+@author: Abinashi Singh
+Opt-in statistics of the alpha-beta search.
+
+Give a SearchStats to mini_max, iterative_deepening, parallel_mini_max or Engine.best_move
+and it counts what the search did: nodes, leaf evaluations, terminal positions, positions the
+tactical check decided, cutoffs per ply, transposition table hits and the nodes and time of every iteration. Without one the
+search only pays for a few "is None" checks.
+
+    stats = SearchStats()
+    col, score = iterative_deepening(position, 1000, stats=stats)
+    print(stats.summary())
+    json.dumps(stats.as_dict())
+"""
+
+import time
+
+
+class SearchStats:
+    """
+    SearchStats: counters of one search (one bot move).
+    nodes= positions mini_max was called on, leaves= positions scored with score_position,
+    terminals= won, lost or drawn positions, tactical= positions decided without searching their moves
+    (a win in one, or every move lets the opponent win), cutoffs_by_depth[depth left]= alpha-beta cutoffs,
+    first_move_cutoffs= cutoffs by the first column searched, tt_probes, tt_hits= positions looked up
+    and found in the transposition table, tt_cutoffs= lookups that ended the search of the position,
+    iterations= one dict per depth of iterative deepening
+    """
+
+    def __init__(self):
+        self.nodes = 0
+        self.leaves = 0
+        self.terminals = 0
+        self.tactical = 0
+        self.cutoffs_by_depth = []
+        self.first_move_cutoffs = 0
+        self.tt_probes = 0
+        self.tt_hits = 0
+        self.tt_cutoffs = 0
+        self.iterations = []
+        self.started = time.perf_counter()
+        self.seconds = 0.0
+        self._iteration_start = None
+
+    """
+    cutoff: mini_max calls this when a column caused an alpha-beta cutoff
+    @:params: depth= depth left at the node, index= how many columns were searched before it
+    """
+    def cutoff(self, depth, index):
+        while len(self.cutoffs_by_depth) <= depth:
+            self.cutoffs_by_depth.append(0)
+        self.cutoffs_by_depth[depth] += 1
+        if index == 0:
+            self.first_move_cutoffs += 1
+
+    """
+    start_iteration: iterative deepening starts a new depth
+    """
+    def start_iteration(self, depth):
+        self._iteration_start = (depth, self.nodes, time.perf_counter())
+
+    """
+    end_iteration: the depth is done (completed=False if the time ran out)
+    """
+    def end_iteration(self, column, value, completed=True):
+        depth, nodes, start = self._iteration_start
+        self.iterations.append({"depth": depth, "nodes": self.nodes - nodes,
+                                "seconds": time.perf_counter() - start,
+                                "column": column, "value": value, "completed": completed})
+
+    """
+    finish: the search is over, fixes the total time
+    """
+    def finish(self):
+        self.seconds = time.perf_counter() - self.started
+
+    """
+    merge: adds the counters of another search, the parallel search collects its workers with it
+    """
+    def merge(self, other):
+        self.nodes += other.nodes
+        self.leaves += other.leaves
+        self.terminals += other.terminals
+        self.tactical += other.tactical
+        for depth, cutoffs in enumerate(other.cutoffs_by_depth):
+            while len(self.cutoffs_by_depth) <= depth:
+                self.cutoffs_by_depth.append(0)
+            self.cutoffs_by_depth[depth] += cutoffs
+        self.first_move_cutoffs += other.first_move_cutoffs
+        self.tt_probes += other.tt_probes
+        self.tt_hits += other.tt_hits
+        self.tt_cutoffs += other.tt_cutoffs
+
+    """
+    cutoffs: total alpha-beta cutoffs
+    """
+    def cutoffs(self):
+        return sum(self.cutoffs_by_depth)
+
+    """
+    cutoffs_per_ply: cutoffs by distance from the root, ply 0 is the root
+    @:params: root_depth= depth the search started with (the deepest iteration by default)
+    """
+    def cutoffs_per_ply(self, root_depth=None):
+        if root_depth is None:
+            root_depth = self.depth()
+        return [self.cutoffs_by_depth[depth] if depth < len(self.cutoffs_by_depth) else 0
+                for depth in range(root_depth, 0, -1)]
+
+    """
+    depth: deepest iteration that finished, or the deepest depth with a cutoff without iterations
+    """
+    def depth(self):
+        completed = [iteration["depth"] for iteration in self.iterations if iteration["completed"]]
+        if completed:
+            return max(completed)
+        return len(self.cutoffs_by_depth) - 1 if self.cutoffs_by_depth else 0
+
+    """
+    nodes_per_second: nodes over the whole time of the search
+    """
+    def nodes_per_second(self):
+        seconds = self.seconds or time.perf_counter() - self.started
+        return self.nodes / seconds if seconds > 0 else 0.0
+
+    """
+    effective_branching_factor: how many times more nodes the last depth took than the one before,
+    or nodes ** (1 / depth) without two finished iterations
+    """
+    def effective_branching_factor(self):
+        completed = [iteration for iteration in self.iterations if iteration["completed"]]
+        if len(completed) >= 2 and completed[-2]["nodes"]:
+            return completed[-1]["nodes"] / completed[-2]["nodes"]
+        depth = self.depth()
+        if depth <= 0 or self.nodes <= 1:
+            return 0.0
+        return self.nodes ** (1 / depth)
+
+    """
+    as_dict: everything as plain numbers and lists, ready for json
+    """
+    def as_dict(self):
+        return {
+            "nodes": self.nodes,
+            "leaves": self.leaves,
+            "terminals": self.terminals,
+            "tactical": self.tactical,
+            "cutoffs": self.cutoffs(),
+            "cutoffs_per_ply": self.cutoffs_per_ply(),
+            "first_move_cutoffs": self.first_move_cutoffs,
+            "tt_probes": self.tt_probes,
+            "tt_hits": self.tt_hits,
+            "tt_cutoffs": self.tt_cutoffs,
+            "depth": self.depth(),
+            "seconds": self.seconds,
+            "nodes_per_second": self.nodes_per_second(),
+            "effective_branching_factor": self.effective_branching_factor(),
+            "iterations": self.iterations,
+        }
+
+    """
+    summary: one line for the log
+    """
+    def summary(self):
+        cutoffs = self.cutoffs()
+        return ("depth %d, %d nodes in %.3fs (%.0f nps), %d leaves, %d terminals, %d tactical, %d cutoffs "
+                "(%.0f%% first move), tt hits %d/%d, ebf %.2f"
+                % (self.depth(), self.nodes, self.seconds, self.nodes_per_second(), self.leaves,
+                   self.terminals, self.tactical, cutoffs, 100 * self.first_move_cutoffs / cutoffs if cutoffs else 0,
+                   self.tt_hits, self.tt_probes, self.effective_branching_factor()))
@@ -0,0 +1,67 @@
+"""
+@author: Abinashi Singh
+Transposition table for the alpha-beta search.
+
+Different move orders reach the same position all the time (drop in column 2 then 4,
+or 4 then 2), without a cache mini_max searches every one of them again.
+The table remembers for every position the depth it was searched to, the score, what kind
+of bound that score is and the best column, keyed by the zobrist hash of the position.
+"""
+
+# what the stored value means, alpha-beta does not always give the exact score
+EXACT = 0
+# the real score is at least the stored value (the search was cut off at beta)
+LOWER_BOUND = 1
+# the real score is at most the stored value (no move got above alpha)
+UPPER_BOUND = 2
+
+DEFAULT_SIZE = 1 << 20
+
+
+class TranspositionTable:
+    """
+    TranspositionTable: fixed number of slots, a position goes in slot hash % size.
+    Every slot holds a tuple (key, depth, flag, value, column, generation).
+    When two positions want the same slot the new one replaces the old one if the
+    old one is from an earlier search (older generation) or was not searched deeper.
+    """
+
+    def __init__(self, size=DEFAULT_SIZE):
+        self.size = size
+        self.entries = [None] * size
+        self.generation = 0
+
+    """
+    new_search: called once per bot move, entries of earlier moves become the first to be replaced
+    """
+    def new_search(self):
+        self.generation += 1
+
+    """
+    clear: forget everything, for example when a new game starts
+    """
+    def clear(self):
+        self.entries = [None] * self.size
+        self.generation = 0
+
+    """
+    probe: look a position up
+    @:params: key= zobrist hash of the position
+    returns (depth, flag, value, column) or None if the position is not in the table
+    """
+    def probe(self, key):
+        entry = self.entries[key % self.size]
+        if entry is None or entry[0] != key:
+            return None
+        return entry[1:5]
+
+    """
+    store: save the result of a search
+    @:params: key= zobrist hash, depth= depth searched, flag= EXACT, LOWER_BOUND or UPPER_BOUND,
+    value= score, column= best column found
+    """
+    def store(self, key, depth, flag, value, column):
+        index = key % self.size
+        entry = self.entries[index]
+        if entry is None or entry[0] == key or entry[5] != self.generation or depth >= entry[1]:
+            self.entries[index] = (key, depth, flag, value, column, self.generation)